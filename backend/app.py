@@ -1,3 +1,6 @@
+import time
+_boot_started = time.perf_counter()
+
 from flask import Flask, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
@@ -6,6 +9,8 @@ from flask_apscheduler import APScheduler
 from mongoengine import connect as mongo_connect, get_connection
 from backend.routes.forecast import forecast_bp
 from backend.routes.portfolio import portfolio_bp
+from backend.services.quote_cache import refresh_quotes_job, QUOTE_REFRESH_SECONDS
+from backend.services.lazy_models import tensorflow_loaded
 load_dotenv()
 
 app = Flask(__name__)
@@ -22,6 +27,16 @@ CORS(app,
 scheduler = APScheduler()
 scheduler.init_app(app)
 scheduler.start()
+
+# Keep quotes for held and forecast tickers warm so pricing endpoints answer from memory
+if QUOTE_REFRESH_SECONDS > 0:
+    scheduler.add_job(
+        id="refresh_quotes",
+        func=refresh_quotes_job,
+        trigger="interval",
+        seconds=QUOTE_REFRESH_SECONDS,
+        replace_existing=True
+    )
 mongo_uri = os.getenv("MONGO_URI")
 try:
     mongo_connect(host=mongo_uri)
@@ -35,6 +50,14 @@ except Exception as e:
 app.register_blueprint(forecast_bp)
 app.register_blueprint(portfolio_bp)
 
+# TensorFlow is loaded on the first model request, so boot should stay well under the budget
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.0"))
+app.config["STARTUP_SECONDS"] = time.perf_counter() - _boot_started
+print(f"[STARTUP] API ready in {app.config['STARTUP_SECONDS']:.2f}s "
+      f"(budget {STARTUP_BUDGET_SECONDS:.2f}s, tensorflow loaded: {tensorflow_loaded()})")
+if app.config["STARTUP_SECONDS"] > STARTUP_BUDGET_SECONDS:
+    print("[STARTUP] Warning: startup exceeded its budget")
+
 @app.route("/")
 def index():
     return jsonify({"message": "Forecasting API is working!"})
@@ -23,15 +23,25 @@ class lstmInfo(Document):
     #     "mape": 0.98,
     #     "train_size": 1000,
     #     "test_size": 200,
-    #     "weights_file": "AAPL_lstm_weights.h5"
+    #     "weights_file": "3f9c...e1"  (model bundle id)
     # }
 
-    # Optional: path or name of saved weights
+    # Optional: id of the model bundle this run saved in the artifact store
     weights_file = StringField(required=False)
 
+    # Member tickers, in embedding order, when the record belongs to the global multi-ticker model (ticker "GLOBAL")
+    tickers = ListField(StringField(), required=False)
+
+    # Date of the last bar the weights were trained on; incremental retrains start after it
+    last_trained_date = DateTimeField(required=False)
+
+    # Hash of the input bars and training config; an identical request reuses this record
+    fingerprint = StringField(required=False)
+
     created_at = DateTimeField(default=datetime.datetime.utcnow)
 
     meta = {
         "collection": "lstmInfo",
+        "indexes": ["fingerprint"],
         "ordering": ["-created_at"]  # newest first
     }
@@ -0,0 +1,27 @@
+from mongoengine import Document, StringField, DictField, DateTimeField, IntField, FloatField
+import datetime
+
+class HyperparameterTrial(Document):
+    search_id = StringField(required=True)  # groups the trials of one search run
+    ticker = StringField(required=True)
+    trial_id = IntField(required=True)
+
+    # e.g. {"units": 32, "dropout": 0.1, "lookback": 30, "batch_size": 64, "learning_rate": 0.001}
+    params = DictField(required=True)
+    status = StringField(required=True, choices=("complete", "pruned", "failed"))
+
+    epochs_trained = IntField()
+    val_loss = FloatField()
+    rmse = FloatField()
+    mae = FloatField()
+    mape = FloatField()
+    wall_time_seconds = FloatField()
+    error = StringField()
+
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+
+    meta = {
+        "collection": "hyperparameterTrials",
+        "indexes": ["search_id", "ticker"],
+        "ordering": ["-created_at"]
+    }
@@ -1,45 +1,51 @@
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
 from backend.services.data_fetcher import fetch
+from backend.services.async_fetcher import fetch_histories
 # from backend.services.varModel import trainModel as trainVARModel  # VAR model not yet implemented
-from backend.services.lstmModel import trainModel as trainLSTMModel
+from backend.services.lazy_models import predictLSTMModel, predictGlobalModel, FORECAST_MODES
+from backend.services.lstm_config import MAX_UNCERTAINTY_SAMPLES, history_period, min_direct_rows, parse_horizon
+from backend.services.training_executor import get_training_executor, run_global_job, run_lstm_job
+from backend.services.training_telemetry import summarize_telemetry
+from backend.services.artifact_store import collect_garbage
 from backend.services.forecast_evaluator import get_forecast_with_errors, evaluate_forecast_against_actual
 from backend.models.forecast import Forecast
 
 forecast_bp = Blueprint("forecast", __name__)
+TRAINING_OPTIONS = ("batch_size", "epochs", "threads", "uncertainty_samples")
 
-def retrain_lstm_job(tickerName, horizon, weights_path):
-    
-    print(f"\nScheduled retraining triggered for {tickerName}")
-    result = fetch(ticker=tickerName)
+def parse_training_options(data, keys=TRAINING_OPTIONS):
+    """Integer training options present in a request body; raises ValueError with a message for the client"""
+    try:
+        options = {key: int(data[key]) for key in keys if data.get(key) is not None}
+    except (TypeError, ValueError):
+        if len(keys) == 1:
+            raise ValueError(f"{keys[0]} must be an integer")
+        raise ValueError(f"{', '.join(keys[:-1])} and {keys[-1]} must be integers")
+    too_small = [key for key in ("batch_size", "epochs", "threads") if options.get(key, 1) < 1]
+    if too_small:
+        raise ValueError(f"{', '.join(too_small)} must be at least 1")
+    if options.get("uncertainty_samples", 0) < 0:
+        raise ValueError("uncertainty_samples must be a non-negative integer")
+    if options.get("uncertainty_samples", 0) > MAX_UNCERTAINTY_SAMPLES:
+        raise ValueError(f"uncertainty_samples must be at most {MAX_UNCERTAINTY_SAMPLES}")
+    return options
 
+def retrain_lstm_job(tickerName, horizon, weights_path, forecast_mode="recursive", training_options=None):
+    # Scheduled retrains fine-tune from the last checkpoint instead of refitting the full history,
+    # with the forecast mode and training options of the request that scheduled them
+    print(f"\nScheduled retraining triggered for {tickerName}")
+    result = fetch(ticker=tickerName, period=history_period(horizon, forecast_mode), parts=("hist",), orient="frame")
     if not result or not result.get("success"):
         print(f"Failed to fetch data for {tickerName} during scheduled retraining")
         return
 
-    historical_data = result.get("hist_df", [])
-    forecast_df, model_info, recordLSTM = trainLSTMModel(
-        historical_data=historical_data,
-        horizon=horizon,
-        ticker=tickerName,
-        weights_path=weights_path
+    job_id, future = get_training_executor().submit(
+        run_lstm_job, tickerName, horizon, result.get("hist_df"), weights_path, forecast_mode, True,
+        training_options
     )
-
-    forecast_json = (
-        forecast_df.reset_index()
-        .rename(columns={"index": "Date"})
-        .to_dict(orient="records")
-    )
-
-    forecast_entry = Forecast(
-        ticker=tickerName,
-        horizon=horizon,
-        forecast_data=forecast_json,
-        model_info=model_info,      
-        lstm_model=recordLSTM
-    )
-    forecast_entry.save()
-    print(f"[OK] Retrained LSTM and saved new forecast for {tickerName}")
+    future.result()
+    print(f"[OK] Retrained LSTM and saved new forecast for {tickerName} (job {job_id})")
 
 
 @forecast_bp.route("/api/forecast/start", methods=["POST"])
@@ -50,43 +56,49 @@ def start_fetching():
         horizon = data.get("horizon", "24d")
         model_name = data.get("model_name", "VAR").upper()
         scheduledTime = data.get("scheduledTime") 
+        forecast_mode = data.get("forecast_mode", "recursive")
+        incremental = bool(data.get("incremental", False))
+        run_async = bool(data.get("async", False))
+        try:
+            training_options = parse_training_options(data)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        if data.get("force"):
+            training_options["force"] = True
+
+        if forecast_mode not in FORECAST_MODES:
+            return jsonify({
+                "success": False,
+                "message": f"forecast_mode must be one of {', '.join(FORECAST_MODES)}"
+            }), 400
+
+        if model_name != "LSTM":
+            return jsonify({
+                "success": False,
+                "message": f"{model_name} model is not implemented."
+            }), 400
 
         print(f"Selected model: {model_name}")
-        print(f"Fetching data for ticker: {tickerName}, horizon: {horizon}")
+        print(f"Training data for ticker: {tickerName}, horizon: {horizon}")
 
-        result = fetch(ticker=tickerName)
+        # Bars are read here, in the only process that writes the price store
+        result = fetch(ticker=tickerName, period=history_period(horizon, forecast_mode), parts=("hist",), orient="frame")
         if not result or not result.get("success"):
             return jsonify({
                 "success": False,
                 "message": "Failed to fetch data for the given ticker and horizon."
             }), 400
+        if forecast_mode == "direct" and len(result["hist_df"]) < min_direct_rows(parse_horizon(horizon)):
+            return jsonify({
+                "success": False,
+                "message": f"{tickerName} has {len(result['hist_df'])} bars, too few to train a direct {horizon} model."
+            }), 400
 
-        historical_data = result.get("hist_df", [])
-        weights_path = f"backend/weights/{tickerName}_lstm.weights.h5"
-
-        if model_name == "LSTM":
-            print("Training LSTM model...")
-            forecast_df, model_info, recordLSTM = trainLSTMModel(
-                historical_data=historical_data,
-                horizon=horizon,
-                ticker=tickerName,
-                weights_path=weights_path
-            )
-
-        forecast_json = (
-            forecast_df.reset_index()
-            .rename(columns={"index": "Date"})
-            .to_dict(orient="records")
-        )
-
-        forecast_entry = Forecast(
-            ticker=tickerName,
-            horizon=horizon,
-            forecast_data=forecast_json,
-            model_info=model_info,  
-            lstm_model=recordLSTM
+        weights_path = f"{tickerName}_lstm"
+        training_job_id, future = get_training_executor().submit(
+            run_lstm_job, tickerName, horizon, result.get("hist_df"), weights_path, forecast_mode, incremental,
+            training_options
         )
-        forecast_entry.save()
 
         if scheduledTime:
             scheduler = current_app.apscheduler
@@ -103,21 +115,239 @@ def start_fetching():
                 func=retrain_lstm_job,
                 trigger='date',
                 run_date=run_date,
-                args=[tickerName, horizon, weights_path]
+                args=[tickerName, horizon, weights_path, forecast_mode, training_options]
             )
             print(f"[SCHEDULED] Retraining scheduled for {tickerName} at {run_date}")
 
+        if run_async:
+            return jsonify({
+                "success": True,
+                "message": f"{model_name} training submitted.",
+                "job_id": training_job_id,
+                "scheduled_retrain": scheduledTime or None,
+                "model_used": model_name
+            }), 202
+
+        # The request thread only waits here; training itself runs in a worker process
+        result = future.result()
         return jsonify({
             "success": True,
             "message": f"{model_name} forecast generated and saved successfully.",
+            "job_id": training_job_id,
             "scheduled_retrain": scheduledTime or None,
             "model_used": model_name,
+            "forecast": result["forecast"],
+            "model_info": result["model_info"]
+        }), 200
+
+    except Exception as e:
+        print("Error in /api/forecast/start:", e)
+        return jsonify({
+            "success": False,
+            "message": f"Server error: {str(e)}"
+        }), 500
+
+
+@forecast_bp.route("/api/forecast/jobs/<job_id>", methods=["GET"])
+def training_job_status(job_id):
+    """Poll a training job submitted with async: true"""
+    status = get_training_executor().status(job_id)
+    if status is None:
+        return jsonify({
+            "success": False,
+            "message": f"Unknown training job: {job_id}"
+        }), 404
+    return jsonify({"success": True, **status}), 200
+
+
+@forecast_bp.route("/api/forecast/telemetry", methods=["GET"])
+def training_telemetry():
+    """Per-ticker training time, throughput and memory aggregated over recent runs"""
+    try:
+        ticker = request.args.get("ticker")
+        try:
+            limit = int(request.args.get("limit", 500))
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "message": "limit must be an integer"
+            }), 400
+        return jsonify({
+            "success": True,
+            "telemetry": summarize_telemetry(ticker, limit)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Error summarizing telemetry: {str(e)}"
+        }), 500
+
+
+@forecast_bp.route("/api/forecast/artifacts/gc", methods=["POST"])
+def collect_model_artifacts():
+    """Delete saved model bundles that no model name or lstmInfo record still references"""
+    try:
+        data = request.get_json(silent=True) or {}
+        options = {"grace_seconds": float(data["grace_seconds"])} if data.get("grace_seconds") is not None else {}
+        return jsonify({"success": True, **collect_garbage(**options)}), 200
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Error collecting model artifacts: {str(e)}"
+        }), 500
+
+
+@forecast_bp.route("/api/forecast/predict", methods=["POST"])
+def predict_forecast():
+    """Forecast from the saved LSTM weights without retraining; /api/forecast/start trains"""
+    try:
+        data = request.get_json() or {}
+        tickerName = data.get("tickerName", "AAPL")
+        horizon = data.get("horizon", "24d")
+        forecast_mode = data.get("forecast_mode", "recursive")
+        global_model = bool(data.get("global_model", False))
+        if global_model and (data.get("forecast_mode") is not None or data.get("uncertainty_samples") is not None):
+            # The global model only rolls forward recursively and has no band support
+            return jsonify({
+                "success": False,
+                "message": "forecast_mode and uncertainty_samples are not supported with global_model"
+            }), 400
+        try:
+            uncertainty_samples = parse_training_options(data, ("uncertainty_samples",)).get("uncertainty_samples", 0)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        # Only a band request is routed past the NumPy engine, so plain predictions omit the option
+        band_options = {"uncertainty_samples": uncertainty_samples} if uncertainty_samples else {}
+
+        if forecast_mode not in FORECAST_MODES:
+            return jsonify({
+                "success": False,
+                "message": f"forecast_mode must be one of {', '.join(FORECAST_MODES)}"
+            }), 400
+
+        period = history_period(horizon, "recursive" if global_model else forecast_mode)
+        result = fetch(ticker=tickerName, period=period, parts=("hist",), orient="frame")
+        if not result or not result.get("success"):
+            return jsonify({
+                "success": False,
+                "message": "Failed to fetch data for the given ticker and horizon."
+            }), 400
+
+        weights_path = f"{tickerName}_lstm"
+        try:
+            if global_model:
+                forecast_df, model_info = predictGlobalModel(
+                    historical_data=result.get("hist_df"),
+                    horizon=horizon,
+                    ticker=tickerName
+                )
+            else:
+                forecast_df, model_info = predictLSTMModel(
+                    historical_data=result.get("hist_df"),
+                    horizon=horizon,
+                    ticker=tickerName,
+                    weights_path=weights_path,
+                    mode=forecast_mode,
+                    **band_options
+                )
+        except FileNotFoundError:
+            return jsonify({
+                "success": False,
+                "message": f"No trained LSTM model for {tickerName}; train one with /api/forecast/start first."
+            }), 404
+        except ValueError as e:
+            # e.g. a ticker outside the global model's universe, or too little history
+            return jsonify({
+                "success": False,
+                "message": str(e)
+            }), 400
+
+        forecast_json = (
+            forecast_df.reset_index()
+            .rename(columns={"index": "Date"})
+            .to_dict(orient="records")
+        )
+
+        Forecast(
+            ticker=tickerName,
+            horizon=horizon,
+            forecast_data=forecast_json,
+            model_info=model_info
+        ).save()
+
+        return jsonify({
+            "success": True,
+            "message": "LSTM forecast generated from saved weights.",
+            "model_used": "LSTM",
             "forecast": forecast_json,
             "model_info": model_info
         }), 200
 
     except Exception as e:
-        print("Error in /api/forecast/start:", e)
+        print("Error in /api/forecast/predict:", e)
+        return jsonify({
+            "success": False,
+            "message": f"Server error: {str(e)}"
+        }), 500
+
+
+@forecast_bp.route("/api/forecast/global/train", methods=["POST"])
+def train_global_forecast():
+    """Train the single global LSTM across a list of tickers and forecast each of them"""
+    try:
+        data = request.get_json() or {}
+        tickers = data.get("tickers") or []
+        horizon = data.get("horizon", "24d")
+        period = data.get("period", "60d")
+        run_async = bool(data.get("async", False))
+        try:
+            training_options = parse_training_options(data, ("batch_size", "epochs", "threads"))
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        if not tickers:
+            return jsonify({
+                "success": False,
+                "message": "tickers must be a non-empty list"
+            }), 400
+
+        histories = fetch_histories(tickers, period=period)
+        if not histories:
+            return jsonify({
+                "success": False,
+                "message": "Failed to fetch data for the given tickers."
+            }), 400
+
+        skipped_tickers = [ticker for ticker in tickers if ticker not in histories]
+        training_job_id, future = get_training_executor().submit(
+            run_global_job, histories, horizon, training_options
+        )
+
+        if run_async:
+            return jsonify({
+                "success": True,
+                "message": f"Global LSTM training on {len(histories)} tickers submitted.",
+                "job_id": training_job_id,
+                "model_used": "GLOBAL_LSTM",
+                "skipped_tickers": skipped_tickers
+            }), 202
+
+        # The request thread only waits here; training itself runs in a worker process
+        result = future.result()
+        return jsonify({
+            "success": True,
+            "message": f"Global LSTM trained on {len(result['forecast'])} tickers.",
+            "job_id": training_job_id,
+            "model_used": "GLOBAL_LSTM",
+            "skipped_tickers": skipped_tickers,
+            "forecast": result["forecast"],
+            "model_info": result["model_info"]
+        }), 200
+
+    except Exception as e:
+        print("Error in /api/forecast/global/train:", e)
         return jsonify({
             "success": False,
             "message": f"Server error: {str(e)}"
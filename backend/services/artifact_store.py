@@ -0,0 +1,209 @@
+"""
+Content-addressed store for trained model artifacts
+
+Every training run that saves its model writes one bundle: a directory
+holding manifest.json (scaler parameters, lookback, feature list, forecast
+mode and whatever else the model needs to serve) and one .npy file per weight
+array. The directory is named after the sha256 of the manifest and array
+bytes, so a bundle is immutable, identical runs share one, and a retrain never
+overwrites the weights an older lstmInfo record points at. Arrays are loaded
+memory-mapped, so opening a bundle costs almost nothing until the weights are
+actually read.
+
+Named refs (e.g. "AAPL_lstm") point at the current bundle of a model and move
+atomically when a retrain finishes. lstmInfo.weights_file holds the bundle id
+of the run that produced it; collect_garbage removes bundles that neither a ref
+nor any lstmInfo record references. The store root is MODEL_STORE_ROOT, which
+defaults to an absolute path under backend/weights so the working directory the
+server is started from no longer matters.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+MODEL_STORE_ROOT = os.getenv(
+    "MODEL_STORE_ROOT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "weights")
+)
+# A bundle younger than this is never collected, since its training run may not have saved its record yet
+GC_GRACE_SECONDS = float(os.getenv("MODEL_STORE_GC_GRACE_SECONDS", "3600"))
+BUNDLE_FORMAT = 1
+# Extensions a legacy weights path may carry; anything else is part of the name, as in BRK.B_lstm
+WEIGHTS_SUFFIXES = (".weights.h5", ".h5")
+
+
+def split_weights_suffix(name: str) -> tuple:
+    """Split a weights file name into its stem and a known weights extension, which may be empty"""
+    for suffix in WEIGHTS_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)], suffix
+    return name, ""
+
+
+def model_ref(weights_path: str) -> str:
+    """Ref name of a model; a legacy weights path such as backend/weights/AAPL_lstm.weights.h5 maps to AAPL_lstm"""
+    return split_weights_suffix(os.path.basename(weights_path))[0]
+
+
+def weight_name(index: int) -> str:
+    """Name of the index-th array of model.get_weights() inside a bundle"""
+    return f"w{index:03d}"
+
+
+class ModelBundle:
+    """A loaded bundle; arrays are read-only memory maps unless loaded with mmap=False"""
+
+    def __init__(self, bundle_id: str, path: str, manifest: dict, arrays: Dict[str, np.ndarray]):
+        self.bundle_id = bundle_id
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+
+    @property
+    def weights(self) -> List[np.ndarray]:
+        """Arrays in model.get_weights() order, ready for model.set_weights"""
+        return [self.arrays[name] for name in self.manifest["weights"]]
+
+
+class ArtifactStore:
+    """Bundles under root/bundles/<sha256>, refs under root/refs/<name>"""
+
+    def __init__(self, root: str = MODEL_STORE_ROOT):
+        self.root = os.path.abspath(root)
+        self.bundles_dir = os.path.join(self.root, "bundles")
+        self.refs_dir = os.path.join(self.root, "refs")
+
+    def bundle_path(self, bundle_id: str) -> str:
+        return os.path.join(self.bundles_dir, bundle_id)
+
+    def exists(self, bundle_id: Optional[str]) -> bool:
+        return bool(bundle_id) and os.path.exists(os.path.join(self.bundle_path(bundle_id), "manifest.json"))
+
+    def bundle_ids(self) -> List[str]:
+        if not os.path.isdir(self.bundles_dir):
+            return []
+        return sorted(name for name in os.listdir(self.bundles_dir) if self.exists(name))
+
+    def save(self, manifest: dict, arrays: Dict[str, np.ndarray]) -> str:
+        """Write a bundle unless an identical one exists and return its id"""
+        arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+        manifest = {"format": BUNDLE_FORMAT, **manifest, "arrays": list(arrays)}
+        encoded = json.dumps(manifest, sort_keys=True, default=str).encode()
+
+        digest = hashlib.sha256(encoded)
+        for name, value in arrays.items():
+            digest.update(f"{name}:{value.dtype.str}:{value.shape}".encode())
+            digest.update(value.tobytes())
+        bundle_id = digest.hexdigest()
+        if self.exists(bundle_id):
+            return bundle_id
+
+        # Written to a scratch directory and renamed into place, so readers never see half a bundle
+        os.makedirs(self.bundles_dir, exist_ok=True)
+        scratch = tempfile.mkdtemp(prefix=".tmp-", dir=self.bundles_dir)
+        try:
+            for name, value in arrays.items():
+                np.save(os.path.join(scratch, f"{name}.npy"), value)
+            with open(os.path.join(scratch, "manifest.json"), "wb") as f:
+                f.write(encoded)
+            os.replace(scratch, self.bundle_path(bundle_id))
+        except OSError:
+            # A concurrent run saved the same bundle first
+            shutil.rmtree(scratch, ignore_errors=True)
+            if not self.exists(bundle_id):
+                raise
+        return bundle_id
+
+    def manifest(self, bundle_id: str) -> dict:
+        """Raises FileNotFoundError for an unknown bundle"""
+        with open(os.path.join(self.bundle_path(bundle_id), "manifest.json")) as f:
+            return json.load(f)
+
+    def load(self, bundle_id: str, mmap: bool = True) -> ModelBundle:
+        path = self.bundle_path(bundle_id)
+        manifest = self.manifest(bundle_id)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+            for name in manifest["arrays"]
+        }
+        return ModelBundle(bundle_id, path, manifest, arrays)
+
+    def set_ref(self, name: str, bundle_id: str) -> None:
+        os.makedirs(self.refs_dir, exist_ok=True)
+        fd, scratch = tempfile.mkstemp(prefix=".tmp-", dir=self.refs_dir)
+        with os.fdopen(fd, "w") as f:
+            f.write(bundle_id)
+        os.replace(scratch, os.path.join(self.refs_dir, name))
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        """Bundle id a ref points at, or None when the model was never saved"""
+        if not name:
+            return None
+        try:
+            with open(os.path.join(self.refs_dir, name)) as f:
+                bundle_id = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return bundle_id if self.exists(bundle_id) else None
+
+    def refs(self) -> Dict[str, str]:
+        if not os.path.isdir(self.refs_dir):
+            return {}
+        names = [name for name in os.listdir(self.refs_dir) if not name.startswith(".")]
+        return {name: bundle_id for name in names if (bundle_id := self.resolve(name))}
+
+    def gc(self, referenced: Iterable[str], grace_seconds: float = GC_GRACE_SECONDS) -> List[str]:
+        """Delete bundles outside referenced and the refs that are older than grace_seconds; returns their ids"""
+        keep = set(referenced) | set(self.refs().values())
+        cutoff = time.time() - grace_seconds
+        removed = []
+        for bundle_id in self.bundle_ids():
+            path = self.bundle_path(bundle_id)
+            if bundle_id in keep or os.path.getmtime(path) > cutoff:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(bundle_id)
+        return removed
+
+
+def current_bundle(weights_path: Optional[str], store: Optional[ArtifactStore] = None) -> Optional[str]:
+    """Id of the bundle the model saved under weights_path currently serves, or None"""
+    if weights_path is None:
+        return None
+    return (store or get_artifact_store()).resolve(model_ref(weights_path))
+
+
+def save_keras_model(model, manifest: dict, ref: Optional[str] = None, store: Optional[ArtifactStore] = None) -> str:
+    """Bundle a model's weights with its manifest and, given a ref, make it that model's current bundle"""
+    store = store or get_artifact_store()
+    weights = model.get_weights()
+    bundle_id = store.save(
+        {**manifest, "weights": [weight_name(i) for i in range(len(weights))]},
+        {weight_name(i): value for i, value in enumerate(weights)}
+    )
+    if ref:
+        store.set_ref(ref, bundle_id)
+    return bundle_id
+
+
+def collect_garbage(store: Optional[ArtifactStore] = None, grace_seconds: float = GC_GRACE_SECONDS) -> dict:
+    """Remove every bundle that no ref and no lstmInfo record points at"""
+    from backend.models.lstmDb import lstmInfo
+
+    store = store or get_artifact_store()
+    referenced = {bundle_id for bundle_id in lstmInfo.objects.distinct("weights_file") if bundle_id}
+    removed = store.gc(referenced, grace_seconds)
+    print(f"[STORE] Removed {len(removed)} unreferenced model bundles from {store.root}")
+    return {"removed": removed, "kept": len(store.bundle_ids())}
+
+
+_artifact_store = ArtifactStore()
+
+
+def get_artifact_store() -> ArtifactStore:
+    return _artifact_store
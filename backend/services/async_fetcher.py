@@ -0,0 +1,64 @@
+"""
+asyncio front end for data_fetcher
+
+The provider clients are synchronous, so each fetch runs in a worker thread;
+the event loop caps how many run at once, and the process-wide token bucket in
+market_data_provider keeps the request rate under the provider's limits.
+
+fetch_histories is what the quote refresh and global training use: one batched
+download first, then concurrent single-ticker fetches for whatever the batch
+came back without, since a multi-ticker download drops a ticker on any error
+of its own.
+"""
+import asyncio
+import os
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+from backend.services.data_fetcher import ALL_PARTS, fetch, fetch_many
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+
+
+async def fetch_async(ticker: str, period: str = "60d", parts: Iterable[str] = ALL_PARTS,
+                      orient: str = "records", semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+    """Awaitable fetch(); pass a semaphore to share a concurrency cap between calls"""
+    if semaphore is None:
+        return await asyncio.to_thread(fetch, ticker, period, tuple(parts), orient)
+    async with semaphore:
+        return await asyncio.to_thread(fetch, ticker, period, tuple(parts), orient)
+
+
+async def fetch_many_async(tickers: List[str], period: str = "60d", parts: Iterable[str] = ALL_PARTS,
+                           orient: str = "records", concurrency: Optional[int] = None) -> Dict[str, dict]:
+    """Fetch many tickers with at most concurrency fetches in flight; results keyed by ticker"""
+    tickers = list(dict.fromkeys(tickers))
+    semaphore = asyncio.Semaphore(concurrency or FETCH_CONCURRENCY)
+    parts = tuple(parts)
+
+    async def run(ticker: str) -> dict:
+        try:
+            return await fetch_async(ticker, period, parts, orient, semaphore=semaphore)
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching {ticker}: {str(e)}"}
+
+    results = await asyncio.gather(*(run(ticker) for ticker in tickers))
+    return dict(zip(tickers, results))
+
+
+def fetch_all(tickers: List[str], period: str = "60d", parts: Iterable[str] = ALL_PARTS,
+              orient: str = "records", concurrency: Optional[int] = None) -> Dict[str, dict]:
+    """Blocking wrapper around fetch_many_async for scheduler jobs and request handlers"""
+    return asyncio.run(fetch_many_async(tickers, period, parts, orient, concurrency))
+
+
+def fetch_histories(tickers: List[str], period: str = "60d",
+                    concurrency: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Bars per ticker like fetch_many, retrying tickers the batch missed one by one; tickers with no data are left out"""
+    tickers = list(dict.fromkeys(tickers))
+    frames = fetch_many(tickers, period=period)
+    missing = [ticker for ticker in tickers if ticker not in frames]
+    if missing:
+        for ticker, result in fetch_all(missing, period, ("hist",), "frame", concurrency).items():
+            if result.get("success"):
+                frames[ticker] = result["hist_df"]
+    return frames
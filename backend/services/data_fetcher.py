@@ -1,32 +1,239 @@
-from typing import Union
+import copy
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
-import yfinance as yf
+from backend.services.market_data_provider import get_provider
+from backend.services.price_store import get_price_store, period_start
+from backend.utils.helpers import SingleFlight, TTLCache
+
+TICKER_VALID_TTL_SECONDS = float(os.getenv("TICKER_VALID_TTL_SECONDS", "86400"))
+TICKER_INVALID_TTL_SECONDS = float(os.getenv("TICKER_INVALID_TTL_SECONDS", "3600"))
+
+# Set TICKER_CACHE_PATH to keep known valid/invalid tickers across restarts
+_ticker_validity = TTLCache(path=os.getenv("TICKER_CACHE_PATH") or None)
+
+_news_cache = TTLCache(ttl=float(os.getenv("NEWS_TTL_SECONDS", "900")))
+
+# Parts of a fetch() result; callers that only train or price on bars should ask for ("hist",)
+ALL_PARTS = ("hist", "news", "merged")
+ORIENTS = ("records", "columns", "frame")
+
+# Concurrent fetch() calls for the same (ticker, period, parts, orient) share one upstream fetch
+_inflight_fetches = SingleFlight()
+
+def _record_validity(ticker: str, valid: bool) -> None:
+    ttl = TICKER_VALID_TTL_SECONDS if valid else TICKER_INVALID_TTL_SECONDS
+    _ticker_validity.set(ticker, valid, ttl=ttl)
 
 def validate_ticker(ticker: str) -> bool:
+    cached = _ticker_validity.get(ticker)
+    if cached is not None:
+        return cached
     try:
-        data = yf.Ticker(ticker)
-        hist = data.history(period="1d")
-        return not hist.empty
+        hist = get_provider().history(ticker, period="1d")
     except Exception as e:
+        # Provider errors say nothing about the ticker, so they are not cached
         print(f"Error validating ticker '{ticker}': {str(e)}")
         return False
+    _record_validity(ticker, not hist.empty)
+    return not hist.empty
+
+STORE_REFRESH_SECONDS = float(os.getenv("PRICE_STORE_REFRESH_SECONDS", "60"))
+
+def _slice_period(hist: pd.DataFrame, start) -> pd.DataFrame:
+    if start is None or hist.empty:
+        return hist
+    sliced = hist[hist['Date'] >= start].reset_index(drop=True)
+    # Like yfinance, a short period over a weekend still returns the last session
+    return sliced if not sliced.empty else hist.tail(1).reset_index(drop=True)
+
+def _store_coverage(store, ticker: str, start):
+    """Return (cached bars, whether they reach back to start, store meta)"""
+    meta = store.get_meta(ticker)
+    cached = store.read(ticker)
+    covered_from = meta.get("covered_from")
+    covered = (
+        cached is not None and not cached.empty and covered_from is not None
+        and (covered_from == "max" or (start is not None and start >= pd.Timestamp(covered_from)))
+    )
+    return cached, covered, meta
+
+def _extend_coverage(meta: dict, start: pd.Timestamp) -> pd.Timestamp:
+    """Walk start back through backfilled ranges that reach it, so contiguous history counts as covered"""
+    earliest = start
+    for range_start, range_end in sorted(meta.get("backfilled") or [], key=lambda r: r[0], reverse=True):
+        if pd.Timestamp(range_end) >= earliest > pd.Timestamp(range_start):
+            earliest = pd.Timestamp(range_start)
+    return earliest
+
+def _store_window(store, ticker: str, hist: pd.DataFrame, start) -> None:
+    # Merged rather than replaced, so bars an earlier backfill stored before start survive
+    covered_from = "max" if start is None else _extend_coverage(store.get_meta(ticker), start).isoformat()
+    store.merge(ticker, hist, covered_from=covered_from, fetched_at=time.time())
 
 def get_structured_data(ticker: str, period: str = "60d") -> Union[pd.DataFrame, None]:
+    """
+    Read bars from the local price store and only download what it is missing:
+    the whole window when the store does not reach back far enough, otherwise
+    just the tail since the last stored bar.
+    """
     try:
-        ticker_obj = yf.Ticker(ticker)
-        hist = ticker_obj.history(period=period)
-        hist.reset_index(inplace=True)
-        hist = hist[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-        return hist
+        provider = get_provider()
+        store = get_price_store()
+        if store is None:
+            hist = provider.history(ticker, period=period)
+            _record_validity(ticker, not hist.empty)
+            return hist
+
+        start = period_start(period, now=provider.now())
+        cached, covered, meta = _store_coverage(store, ticker, start)
+
+        if not covered:
+            hist = provider.history(ticker, period=period)
+            _record_validity(ticker, not hist.empty)
+            if hist.empty:
+                return hist
+            _store_window(store, ticker, hist, start)
+            return _slice_period(hist, start)
+
+        if time.time() - meta.get("fetched_at", 0) > STORE_REFRESH_SECONDS:
+            # Re-request the last stored session too, it may have been a partial bar
+            last_date = pd.Timestamp(cached['Date'].iloc[-1])
+            tail = provider.history(ticker, start=last_date.strftime("%Y-%m-%d"))
+            if not tail.empty:
+                store.append(ticker, tail)
+                cached = store.read(ticker)
+            store.update_meta(ticker, fetched_at=time.time())
+
+        return _slice_period(cached, start)
     except Exception as e:
         print("Error fetching structured data:", e)
         return None
 
+def fetch_many(tickers: List[str], period: str = "60d") -> Dict[str, pd.DataFrame]:
+    """
+    History for several tickers at once. Tickers the price store can answer
+    without a refresh are served locally; the rest are downloaded together in a
+    single batched provider request. Tickers with no data are left out.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    provider = get_provider()
+    store = get_price_store()
+    start = period_start(period, now=provider.now())
+    frames, coverage, missing = {}, {}, []
+
+    for ticker in tickers:
+        if store is not None:
+            try:
+                cached, covered, meta = _store_coverage(store, ticker, start)
+            except Exception as e:
+                print(f"Error reading price store for {ticker}:", e)
+                cached, covered, meta = None, False, {}
+            if covered and time.time() - meta.get("fetched_at", 0) <= STORE_REFRESH_SECONDS:
+                frames[ticker] = _slice_period(cached, start)
+                continue
+            coverage[ticker] = covered
+        missing.append(ticker)
+
+    if not missing:
+        return frames
+
+    try:
+        downloaded = provider.history_many(missing, period=period)
+    except Exception as e:
+        print("Error fetching batched structured data:", e)
+        return frames
+
+    for ticker in missing:
+        hist = downloaded.get(ticker)
+        if hist is None or hist.empty:
+            continue
+        _record_validity(ticker, True)
+        if store is not None:
+            try:
+                if coverage.get(ticker):
+                    store.append(ticker, hist)
+                    store.update_meta(ticker, fetched_at=time.time())
+                else:
+                    _store_window(store, ticker, hist, start)
+            except Exception as e:
+                print(f"Error writing price store for {ticker}:", e)
+        frames[ticker] = _slice_period(hist, start)
+    return frames
+
+def backfill(ticker: str, start: str, end: Optional[str] = None, chunk_days: int = 365) -> Iterator[pd.DataFrame]:
+    """
+    Pull history from start to end (default now) in chunks of chunk_days and
+    write each chunk straight into the price store, yielding it as it lands so
+    no more than one chunk is held in memory. Progress is kept in the store
+    meta, so calling again with the same start resumes after the last chunk.
+    """
+    store = get_price_store()
+    if store is None:
+        raise ValueError("backfill needs the price store; PRICE_STORE_DIR is disabled")
+
+    provider = get_provider()
+    start_ts = pd.Timestamp(start, tz="UTC") if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+    end_ts = provider.now().normalize() + pd.Timedelta(days=1) if end is None else pd.Timestamp(end, tz="UTC")
+    step = pd.Timedelta(days=chunk_days)
+
+    progress = store.get_meta(ticker).get("backfill") or {}
+    cursor = start_ts
+    if progress.get("start") == start_ts.isoformat() and progress.get("cursor"):
+        cursor = max(start_ts, pd.Timestamp(progress["cursor"]))
+
+    while cursor < end_ts:
+        chunk_end = min(cursor + step, end_ts)
+        chunk = provider.history(ticker, start=cursor.strftime("%Y-%m-%d"), end=chunk_end.strftime("%Y-%m-%d"))
+        if chunk is not None and not chunk.empty:
+            _record_validity(ticker, True)
+            store.append(ticker, chunk)
+        store.update_meta(ticker, backfill={
+            "start": start_ts.isoformat(),
+            "end": end_ts.isoformat(),
+            "cursor": chunk_end.isoformat(),
+        })
+        cursor = chunk_end
+        if chunk is not None and not chunk.empty:
+            yield chunk
+
+    # Every finished range is recorded, so a later fetch whose window reaches it can count it as covered
+    meta = store.get_meta(ticker)
+    backfilled = [r for r in meta.get("backfilled") or [] if r != [start_ts.isoformat(), end_ts.isoformat()]]
+    fields = {"backfilled": backfilled + [[start_ts.isoformat(), end_ts.isoformat()]]}
+
+    # The store now reaches back to start; only claim that when it is contiguous up to the present
+    covered_from = meta.get("covered_from")
+    if covered_from != "max" and (
+        end is None or (covered_from is not None and pd.Timestamp(covered_from) <= end_ts)
+    ):
+        earliest = start_ts if covered_from is None else min(start_ts, pd.Timestamp(covered_from))
+        fields["covered_from"] = _extend_coverage(fields, earliest).isoformat()
+        if end is None:
+            fields["fetched_at"] = time.time()
+    store.update_meta(ticker, **fields)
+
+def backfill_many(tickers: List[str], start: str, end: Optional[str] = None,
+                  chunk_days: int = 365) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Backfill tickers one after another, yielding (ticker, chunk) pairs"""
+    for ticker in tickers:
+        try:
+            for chunk in backfill(ticker, start, end=end, chunk_days=chunk_days):
+                yield ticker, chunk
+        except Exception as e:
+            print(f"Error backfilling {ticker}:", e)
+
 def get_unstructured_data(ticker: str) -> Union[pd.DataFrame, None]:
+    cached = _news_cache.get(ticker)
+    if cached is not None:
+        # An empty frame marks a ticker that had no news
+        return cached.copy() if not cached.empty else None
     try:
-        ticker_obj = yf.Ticker(ticker)
-        news_list = ticker_obj.news
+        news_list = get_provider().news(ticker)
         if not news_list:
+            _news_cache.set(ticker, pd.DataFrame())
             return None
         
         data = []
@@ -46,6 +253,7 @@ def get_unstructured_data(ticker: str) -> Union[pd.DataFrame, None]:
         
         news_df = pd.DataFrame(data)
         news_df['published_date'] = pd.to_datetime(news_df['published_date'], errors='coerce', utc=True)
+        _news_cache.set(ticker, news_df.copy())
         return news_df
 
     except Exception as e:
@@ -70,31 +278,91 @@ def merge_data(hist_df: pd.DataFrame, news_df: pd.DataFrame) -> pd.DataFrame:
     )
     return merged
 
+def _iso_dates(values: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of calling isoformat() on every timestamp (None for NaT).
+    UTC and naive columns are formatted in one NumPy call; other zones fall back
+    to strftime because their offset varies per row.
+    """
+    tz = values.dt.tz
+    has_micros = bool((values.dt.microsecond.fillna(0) != 0).any())
+    if tz is None or str(tz) == "UTC":
+        naive = values.dt.tz_localize(None) if tz is not None else values
+        text = np.datetime_as_string(naive.to_numpy(dtype="datetime64[ns]"), unit="us" if has_micros else "s")
+        if tz is not None:
+            text = np.char.add(text, "+00:00")
+        formatted = pd.Series(text, index=values.index, dtype=object)
+    else:
+        fmt = "%Y-%m-%dT%H:%M:%S.%f%z" if has_micros else "%Y-%m-%dT%H:%M:%S%z"
+        formatted = values.dt.strftime(fmt).str.replace(r"([+-]\d{2})(\d{2})$", r"\1:\2", regex=True)
+    return formatted.where(values.notna(), None)
+
 def df_to_serializable(df: pd.DataFrame) -> pd.DataFrame:
     """
     Convert datetime columns to ISO strings and handle NaT
     """
     df_copy = df.copy()
-    for col in df_copy.select_dtypes(include=['datetime64[ns, UTC]', 'datetime64[ns]']):
-        df_copy[col] = df_copy[col].apply(lambda x: x.isoformat() if pd.notnull(x) else None)
+    for col in df_copy.select_dtypes(include=['datetime', 'datetimetz']):
+        df_copy[col] = _iso_dates(df_copy[col])
     return df_copy
 
-def fetch(ticker: str, period: str = "60d") -> dict:
-    if not validate_ticker(ticker):
+def _to_orient(df: Union[pd.DataFrame, None], orient: str):
+    if orient == "frame":
+        return df
+    if df is None:
+        return {} if orient == "columns" else []
+    if orient == "columns":
+        return df_to_serializable(df).to_dict(orient="list")
+    return df_to_serializable(df).to_dict(orient="records")
+
+def fetch(ticker: str, period: str = "60d", parts: Iterable[str] = ALL_PARTS, orient: str = "records") -> dict:
+    """
+    Fetch history and/or news for a ticker. parts selects which of "hist",
+    "news" and "merged" are built; news is only requested from the provider
+    when "news" or "merged" is asked for.
+
+    orient controls the shape of each part: "records" (list of row dicts, JSON
+    ready), "columns" (dict of column -> list, JSON ready) or "frame" (the
+    DataFrame itself, for in-process callers that would rebuild one anyway).
+    """
+    if orient not in ORIENTS:
+        raise ValueError(f"Unsupported orient: {orient}")
+    parts = tuple(sorted(set(parts)))
+    result = _inflight_fetches.do((ticker, period, parts, orient), _fetch, ticker, period, parts, orient)
+    # Every caller gets its own frames, records and columns so one caller's edits never leak into another's
+    return {
+        key: value.copy() if isinstance(value, pd.DataFrame) else copy.deepcopy(value)
+        for key, value in result.items()
+    }
+
+def _fetch(ticker: str, period: str, parts: tuple, orient: str) -> dict:
+    # A successful history download doubles as validation, so the separate
+    # validate_ticker round trip is only paid when history could not be fetched
+    if _ticker_validity.get(ticker) is False:
         return {"success": False, "message": f"Invalid ticker: {ticker}"}
-    
+
     hist_df = get_structured_data(ticker, period=period)
-    news_df = get_unstructured_data(ticker)
-    merged_df = merge_data(hist_df, news_df)
-
-    if merged_df is not None and not merged_df.empty:
-        return {
-            "success": True,
-            "ticker": ticker,
-            "merged_df": df_to_serializable(merged_df).to_dict(orient="records"),
-            "hist_df": df_to_serializable(hist_df).to_dict(orient="records") if hist_df is not None else [],
-            "news_df": df_to_serializable(news_df).to_dict(orient="records") if news_df is not None else [],
-            "rows": len(merged_df)
-        }
-    else:
-        return {"success": False, "message": "No merged data available"}
+    if (hist_df is None or hist_df.empty) and not validate_ticker(ticker):
+        return {"success": False, "message": f"Invalid ticker: {ticker}"}
+
+    if hist_df is not None:
+        # Same UTC dates callers got when every fetch went through merge_data
+        hist_df['Date'] = pd.to_datetime(hist_df['Date'], errors='coerce', utc=True)
+
+    include_news = "news" in parts or "merged" in parts
+    news_df = get_unstructured_data(ticker) if include_news else None
+    merged_df = merge_data(hist_df, news_df) if "merged" in parts else None
+    primary_df = merged_df if "merged" in parts else hist_df
+
+    if primary_df is None or primary_df.empty:
+        return {"success": False, "message": "No merged data available" if "merged" in parts else "No historical data available"}
+
+    result = {"success": True, "ticker": ticker}
+    if "merged" in parts:
+        result["merged_df"] = _to_orient(merged_df, orient)
+    if "hist" in parts:
+        result["hist_df"] = _to_orient(hist_df, orient)
+    if "news" in parts:
+        result["news_df"] = _to_orient(news_df, orient)
+    result["rows"] = len(primary_df)
+    return result
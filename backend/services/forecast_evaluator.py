@@ -113,15 +113,15 @@ def get_forecast_with_errors(ticker: str, forecast_id: Optional[str] = None) ->
         end_date = forecast_df['Date'].max()
         days_diff = (end_date - start_date).days + 10  # Add buffer
         
-        result = fetch(ticker=ticker, period=f"{max(days_diff, 60)}d")  # Minimum 60 days
+        result = fetch(ticker=ticker, period=f"{max(days_diff, 60)}d", parts=("hist",), orient="frame")  # Minimum 60 days
         if not result or not result.get("success"):
             return {
                 "success": False,
                 "message": "Could not fetch actual price data"
             }
         
-        hist_data = result.get("hist_df", [])
-        if not hist_data:
+        hist_data = result.get("hist_df")
+        if hist_data is None or len(hist_data) == 0:
             return {
                 "success": False,
                 "message": "No historical data available"
@@ -0,0 +1,247 @@
+"""
+Global LSTM trained once across a universe of tickers
+
+Instead of one network and weights file per ticker, a single network learns
+from the windows of every member ticker. Each ticker is min-max scaled on its
+own history so prices of very different magnitudes share one input range, and
+a learned ticker embedding is fed alongside every bar so the network can still
+tell members apart. Forecasts are served for any member from the one set of
+weights, with the per-ticker scalers kept in the model bundle's manifest.
+"""
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.preprocessing import MinMaxScaler
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import LSTM, Dense, Dropout, Embedding, Input, RepeatVector, Concatenate, Flatten
+from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.utils import PyDataset
+from backend.models.lstmDb import lstmInfo
+from backend.services.lstmModel import (
+    TRAIN_BATCH_SIZE, TRAIN_EPOCHS, configure_threads, create_sequences, error_metrics
+)
+from backend.services.artifact_store import current_bundle, get_artifact_store, model_ref, save_keras_model
+from backend.services.lstm_config import parse_horizon, prepare_frame, restore_scaler, forecast_index
+from backend.services.model_registry import get_model_registry
+
+GLOBAL_TICKER = "GLOBAL"
+GLOBAL_WEIGHTS_PATH = "global_lstm"
+EMBEDDING_DIM = 8
+
+
+def build_global_model(lookback, n_features, n_tickers, embedding_dim=EMBEDDING_DIM):
+    """Same LSTM stack as the per-ticker model, with the ticker embedding concatenated to every bar"""
+    window = Input(shape=(lookback, n_features), name="window")
+    ticker_id = Input(shape=(1,), dtype="int32", name="ticker_id")
+    embedded = Flatten()(Embedding(n_tickers, embedding_dim)(ticker_id))
+    x = Concatenate()([window, RepeatVector(lookback)(embedded)])
+    x = LSTM(50, return_sequences=True)(x)
+    x = Dropout(0.2)(x)
+    x = LSTM(50, return_sequences=False)(x)
+    x = Dropout(0.2)(x)
+    x = Dense(25, activation='relu')(x)
+    model = Model(inputs=[window, ticker_id], outputs=Dense(n_features)(x))
+    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    return model
+
+
+class GlobalSequenceBatches(PyDataset):
+    """
+    Shuffled batches drawn across the per-ticker window views, so the full
+    universe of windows is never concatenated into one array
+    """
+
+    def __init__(self, sequences, batch_size=32, seed=42, **kwargs):
+        super().__init__(**kwargs)
+        self.sequences = sequences
+        self.batch_size = batch_size
+        self._owner = np.concatenate([np.full(len(X), i) for i, (X, _) in enumerate(sequences)])
+        self._row = np.concatenate([np.arange(len(X)) for X, _ in sequences])
+        self._rng = np.random.default_rng(seed)
+        self._order = self._rng.permutation(len(self._owner))
+
+    def __len__(self):
+        return int(np.ceil(len(self._order) / self.batch_size))
+
+    def __getitem__(self, index):
+        picks = self._order[index * self.batch_size:(index + 1) * self.batch_size]
+        owners, rows = self._owner[picks], self._row[picks]
+        X = np.stack([self.sequences[o][0][r] for o, r in zip(owners, rows)]).astype(np.float32)
+        y = np.stack([self.sequences[o][1][r] for o, r in zip(owners, rows)]).astype(np.float32)
+        return (X, owners.reshape(-1, 1).astype(np.int32)), y
+
+    def on_epoch_end(self):
+        self._rng.shuffle(self._order)
+
+
+@tf.function(reduce_retracing=True)
+def _global_rollout(model, window, ticker_id, steps):
+    outputs = tf.TensorArray(tf.float32, size=steps)
+    for i in tf.range(steps):
+        next_pred = model([window, ticker_id], training=False)
+        outputs = outputs.write(i, next_pred[0])
+        window = tf.concat([window[:, 1:], next_pred[:, tf.newaxis]], axis=1)
+    return outputs.stack()
+
+
+def _forecast_ticker(model, df, scaler, lookback, ticker_index, steps):
+    window = tf.convert_to_tensor(scaler.transform(df.values[-lookback:])[np.newaxis], dtype=tf.float32)
+    ticker_id = tf.constant([[ticker_index]], dtype=tf.int32)
+    forecast = _global_rollout(model, window, ticker_id, tf.constant(steps, dtype=tf.int32)).numpy()
+    forecast_df = pd.DataFrame(scaler.inverse_transform(forecast), columns=df.columns)
+    forecast_df.index = forecast_index(df, steps)
+    return forecast_df
+
+
+def _checkout(lookback, n_features, tickers, for_training=False):
+    # Keyed by the ordered universe, since embedding row i belongs to tickers[i]
+    return get_model_registry().checkout(
+        (GLOBAL_TICKER, lookback, n_features, tuple(tickers)),
+        lambda: build_global_model(lookback, n_features, len(tickers)),
+        for_training=for_training
+    )
+
+
+def trainGlobalModel(histories, horizon, weights_path=GLOBAL_WEIGHTS_PATH,
+                     batch_size=TRAIN_BATCH_SIZE, epochs=TRAIN_EPOCHS, threads=None):
+    """
+    Train one model on every ticker in histories (ticker -> historical data) and
+    forecast each member. Returns (forecasts by ticker, model_info, lstmInfo record).
+    batch_size, epochs and threads mean the same as for trainModel. The saved
+    weights are only warm-started from when they were trained on exactly the
+    same ordered ticker list.
+    """
+    if threads:
+        configure_threads(threads)
+    frames = {ticker: prepare_frame(hist) for ticker, hist in histories.items()}
+    tickers = sorted(frames)
+    if not tickers:
+        raise ValueError("Global training needs at least one ticker")
+    steps = parse_horizon(horizon)
+    n_features = frames[tickers[0]].shape[1]
+
+    scalers, train_sets, test_sets = {}, [], []
+    shortest_train = min(int(len(frames[t]) * 0.8) for t in tickers)
+    lookback = min(60, shortest_train // 2)
+    if lookback < 1:
+        raise ValueError(f"Global training needs more history than {shortest_train} training rows per ticker")
+    for ticker in tickers:
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaled_data = scaler.fit_transform(frames[ticker].values)
+        train_size = int(len(scaled_data) * 0.8)
+        scalers[ticker] = scaler
+        train_sets.append(create_sequences(scaled_data[:train_size], lookback))
+        test_sets.append(create_sequences(scaled_data[train_size:], lookback))
+
+    registry = get_model_registry()
+    lease = _checkout(lookback, n_features, tickers, for_training=True)
+    model = lease.model
+    on_disk_version = current_bundle(weights_path)
+    if on_disk_version is not None and on_disk_version != lease.weights_version:
+        bundle = get_artifact_store().load(on_disk_version)
+        if bundle.manifest.get("tickers") == tickers:
+            model.set_weights(bundle.weights)
+            print(f"Loaded existing global weights from bundle {on_disk_version}")
+        else:
+            # Another universe's embedding rows would be read as these tickers
+            print("Global weights were trained on a different universe, training from scratch")
+
+    early_stop = EarlyStopping(monitor='loss', patience=10, restore_best_weights=True)
+    history = model.fit(
+        GlobalSequenceBatches(train_sets, batch_size=batch_size), epochs=epochs, callbacks=[early_stop], verbose=0
+    )
+
+    bundle_id = None
+    if weights_path is not None:
+        bundle_id = save_keras_model(model, {
+            "ticker": GLOBAL_TICKER,
+            "tickers": tickers,
+            "features": list(frames[tickers[0]].columns),
+            "lookback": lookback,
+            "n_features": n_features,
+            "scalers": {
+                ticker: {"data_min": scaler.data_min_.tolist(), "data_max": scaler.data_max_.tolist()}
+                for ticker, scaler in scalers.items()
+            }
+        }, ref=model_ref(weights_path))
+        print(f"Saved global model bundle {bundle_id} as {model_ref(weights_path)}")
+    lease.weights_version = bundle_id
+
+    forecasts, per_ticker = {}, {}
+    for index, ticker in enumerate(tickers):
+        X, y = test_sets[index] if len(test_sets[index][0]) else train_sets[index]
+        ids = np.full((len(X), 1), index, dtype=np.int32)
+        rmse, mae, mape = error_metrics(model, [X, ids], y, scalers[ticker], n_features)
+        per_ticker[ticker] = {"rmse": float(rmse), "mae": float(mae), "mape": float(mape)}
+        forecasts[ticker] = _forecast_ticker(model, frames[ticker], scalers[ticker], lookback, index, steps)
+    registry.checkin(lease)
+
+    model_info = {
+        "model_type": "GLOBAL_LSTM",
+        "tickers": tickers,
+        "lookback_period": lookback,
+        "total_params": model.count_params(),
+        "epochs_trained": len(history.history['loss']),
+        "final_loss": float(history.history['loss'][-1]),
+        "rmse": float(np.mean([m["rmse"] for m in per_ticker.values()])),
+        "mae": float(np.mean([m["mae"] for m in per_ticker.values()])),
+        "mape": float(np.mean([m["mape"] for m in per_ticker.values()])),
+        "per_ticker": per_ticker,
+        "train_size": int(sum(len(X) for X, _ in train_sets)),
+        "test_size": int(sum(len(X) for X, _ in test_sets))
+    }
+
+    forecast_list = [
+        {"Ticker": ticker, **row}
+        for ticker, forecast_df in forecasts.items()
+        for row in forecast_df.reset_index().rename(columns={"index": "Date"}).to_dict(orient="records")
+    ]
+    recordLSTM = lstmInfo(
+        ticker=GLOBAL_TICKER,
+        horizon=horizon,
+        forecast_data=forecast_list,
+        model_info={**model_info, "weights_file": bundle_id} if bundle_id else model_info,
+        weights_file=bundle_id,
+        tickers=tickers
+    )
+    recordLSTM.save()
+    print(f"[SAVED] Global model for {len(tickers)} tickers saved to MongoDB with ID: {recordLSTM.id}")
+    return forecasts, model_info, recordLSTM
+
+
+def predictGlobalModel(historical_data, horizon, ticker, weights_path=GLOBAL_WEIGHTS_PATH):
+    """
+    Forecast one member ticker from the saved global model without training.
+    Raises FileNotFoundError when no global model is saved and ValueError when
+    the ticker was not part of its universe.
+    """
+    on_disk_version = current_bundle(weights_path)
+    if on_disk_version is None:
+        raise FileNotFoundError(f"No trained global LSTM bundle at {weights_path}")
+    bundle = get_artifact_store().load(on_disk_version)
+    config = bundle.manifest
+    if ticker not in config['tickers']:
+        raise ValueError(f"{ticker} is not part of the global model's universe")
+
+    df = prepare_frame(historical_data)
+    lookback = config['lookback']
+    if len(df) < lookback:
+        raise ValueError(f"Prediction needs the last {lookback} bars, got {len(df)}")
+
+    lease = _checkout(lookback, config['n_features'], config['tickers'])
+    if lease.weights_version != on_disk_version:
+        lease.model.set_weights(bundle.weights)
+        lease.weights_version = on_disk_version
+    forecast_df = _forecast_ticker(
+        lease.model, df, restore_scaler(config['scalers'][ticker]), lookback,
+        config['tickers'].index(ticker), parse_horizon(horizon)
+    )
+    get_model_registry().checkin(lease)
+
+    model_info = {
+        "model_type": "GLOBAL_LSTM",
+        "lookback_period": lookback,
+        "weights_file": on_disk_version,
+        "retrained": False
+    }
+    return forecast_df, model_info
@@ -0,0 +1,149 @@
+"""
+Parallel hyperparameter search for the per-ticker LSTM
+
+Trials sample units, dropout, lookback, batch size and learning rate from a
+search space and run on the shared training pool, so a search never uses more
+cores than trainings do. Every trial reports its validation loss after each
+epoch into a manager dict shared across the worker processes; once past a few
+warm-up epochs, a trial whose loss is worse than the median of the other
+trials at the same epoch is pruned (stopped early), like a median pruner.
+
+Each trial's outcome, metrics and wall time are saved as a
+HyperparameterTrial document, grouped by a search id.
+"""
+import itertools
+import multiprocessing
+import time
+import uuid
+from typing import Optional
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+from tensorflow.keras.callbacks import Callback, EarlyStopping
+from backend.models.tuning import HyperparameterTrial
+from backend.services.lstmModel import (
+    TRAIN_SHUFFLE_SEED, build_lstm_model, create_sequences, error_metrics, training_dataset, window_dataset
+)
+from backend.services.lstm_config import prepare_frame
+from backend.services.training_executor import get_training_executor
+
+DEFAULT_SEARCH_SPACE = {
+    "units": [32, 50, 64],
+    "dropout": [0.1, 0.2, 0.3],
+    "lookback": [20, 40, 60],
+    "batch_size": [32, 64],
+    "learning_rate": [0.0005, 0.001, 0.003]
+}
+DEFAULT_TRIALS = 12
+PRUNING_WARMUP_EPOCHS = 3
+PRUNING_MIN_PEERS = 2
+
+
+def sample_trials(search_space, n_trials, seed=42):
+    """Every grid point when the grid is small enough, otherwise a random subset of it"""
+    names = sorted(search_space)
+    grid = list(itertools.product(*(search_space[name] for name in names)))
+    if len(grid) > n_trials:
+        picks = np.random.default_rng(seed).choice(len(grid), size=n_trials, replace=False)
+        grid = [grid[i] for i in sorted(picks)]
+    return [
+        {name: (value.item() if isinstance(value, np.generic) else value) for name, value in zip(names, point)}
+        for point in grid
+    ]
+
+
+class MedianPruning(Callback):
+    """Stops a trial whose validation loss is above the median of its peers at the same epoch"""
+
+    def __init__(self, reports, trial_id, warmup_epochs=PRUNING_WARMUP_EPOCHS, min_peers=PRUNING_MIN_PEERS):
+        super().__init__()
+        self.reports = reports
+        self.trial_id = trial_id
+        self.warmup_epochs = warmup_epochs
+        self.min_peers = min_peers
+        self.pruned = False
+
+    def on_epoch_end(self, epoch, logs=None):
+        val_loss = float((logs or {}).get("val_loss", np.inf))
+        self.reports[f"{epoch}:{self.trial_id}"] = val_loss
+        if epoch + 1 < self.warmup_epochs:
+            return
+        prefix, own = f"{epoch}:", f"{epoch}:{self.trial_id}"
+        peers = [loss for key, loss in self.reports.items() if key.startswith(prefix) and key != own]
+        if len(peers) >= self.min_peers and val_loss > np.median(peers):
+            self.pruned = True
+            self.model.stop_training = True
+
+
+def run_trial(historical_data, params, trial_id, reports, max_epochs):
+    """Train and score one configuration on a chronological 80/20 split; runs inside a pool worker"""
+    started = time.perf_counter()
+    df = prepare_frame(historical_data)
+    values = df.values
+    n_features = values.shape[1]
+    train_size = int(len(values) * 0.8)
+    lookback = params["lookback"]
+    if train_size - lookback < 1 or len(values) - train_size < 1:
+        raise ValueError(f"lookback {lookback} is too long for {len(values)} bars")
+
+    # Only the training part fits the scaler, so validation stays unseen
+    scaler = MinMaxScaler(feature_range=(0, 1)).fit(values[:train_size])
+    scaled = scaler.transform(values)
+    X_val, y_val = create_sequences(scaled[train_size - lookback:], lookback)
+
+    model = build_lstm_model(
+        (lookback, n_features), n_features,
+        units=params["units"], dropout=params["dropout"], learning_rate=params["learning_rate"]
+    )
+    pruning = MedianPruning(reports, trial_id)
+    history = model.fit(
+        training_dataset(window_dataset(scaled[:train_size], lookback, shuffle_seed=TRAIN_SHUFFLE_SEED),
+                         batch_size=params["batch_size"]),
+        validation_data=(X_val.astype(np.float32), y_val.astype(np.float32)),
+        epochs=max_epochs,
+        callbacks=[EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True), pruning],
+        verbose=0
+    )
+    rmse, mae, mape = error_metrics(model, X_val, y_val, scaler, n_features)
+    return {
+        "trial_id": trial_id,
+        "params": params,
+        "status": "pruned" if pruning.pruned else "complete",
+        "epochs_trained": len(history.history['loss']),
+        "val_loss": float(min(history.history['val_loss'])),
+        "rmse": float(rmse),
+        "mae": float(mae),
+        "mape": float(mape),
+        "wall_time_seconds": time.perf_counter() - started
+    }
+
+
+def runSearch(historical_data, ticker, search_space=None, n_trials=DEFAULT_TRIALS, max_epochs=30,
+              executor=None, seed=42) -> dict:
+    """
+    Run a search over search_space (name -> candidate values, defaults to
+    DEFAULT_SEARCH_SPACE) and return the search id, every trial and the best
+    completed one by validation RMSE.
+    """
+    executor = executor or get_training_executor()
+    trials = sample_trials(search_space or DEFAULT_SEARCH_SPACE, n_trials, seed=seed)
+    search_id = uuid.uuid4().hex
+    results = []
+
+    with multiprocessing.get_context("spawn").Manager() as manager:
+        reports = manager.dict()
+        submitted = [
+            (trial_id, params, executor.submit(run_trial, historical_data, params, trial_id, reports, max_epochs)[1])
+            for trial_id, params in enumerate(trials)
+        ]
+        for trial_id, params, future in submitted:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"trial_id": trial_id, "params": params, "status": "failed", "error": str(e)}
+            HyperparameterTrial(search_id=search_id, ticker=ticker, **result).save()
+            results.append(result)
+            print(f"[SEARCH] {ticker} trial {trial_id} {result['status']}: {params}")
+
+    finished = [r for r in results if r["status"] == "complete"] or [r for r in results if r["status"] == "pruned"]
+    best: Optional[dict] = min(finished, key=lambda r: r["rmse"]) if finished else None
+    return {"search_id": search_id, "ticker": ticker, "best": best, "trials": results}
@@ -0,0 +1,50 @@
+"""
+TensorFlow-free entry points to the model services
+
+Importing lstmModel or global_lstm loads TensorFlow, which costs seconds and
+hundreds of MB per worker. Routes import these wrappers instead, so the API
+boots and serves portfolio requests without it, and TensorFlow is only loaded
+the first time a model is actually trained or asked for a forecast. Forecasts
+from a model bundle with a NumPy layer spec never load it at all.
+"""
+import os
+import sys
+
+FORECAST_MODES = ("recursive", "direct")
+# "numpy" serves forecasts from the bundle's arrays when it can; "keras" always uses TensorFlow
+LSTM_INFERENCE_ENGINE = os.getenv("LSTM_INFERENCE_ENGINE", "numpy")
+
+
+def tensorflow_loaded() -> bool:
+    return "tensorflow" in sys.modules
+
+
+def trainLSTMModel(*args, **kwargs):
+    from backend.services.lstmModel import trainModel
+    return trainModel(*args, **kwargs)
+
+
+def predictLSTMModel(*args, **kwargs):
+    """
+    Serve with the NumPy forward pass when the bundle supports it, otherwise load
+    the Keras model; uncertainty bands need Keras's dropout sampling
+    """
+    uncertainty_samples = kwargs.pop("uncertainty_samples", 0)
+    if LSTM_INFERENCE_ENGINE == "numpy" and not uncertainty_samples:
+        from backend.services.numpy_lstm import predictNumpyModel
+        try:
+            return predictNumpyModel(*args, **kwargs)
+        except FileNotFoundError:
+            pass
+    from backend.services.lstmModel import predictModel
+    return predictModel(*args, uncertainty_samples=uncertainty_samples, **kwargs)
+
+
+def trainGlobalModel(*args, **kwargs):
+    from backend.services.global_lstm import trainGlobalModel
+    return trainGlobalModel(*args, **kwargs)
+
+
+def predictGlobalModel(*args, **kwargs):
+    from backend.services.global_lstm import predictGlobalModel
+    return predictGlobalModel(*args, **kwargs)
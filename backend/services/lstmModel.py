@@ -1,12 +1,24 @@
 import os
+import time
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.layers import LSTM, Dense, Dropout, Reshape
+from tensorflow.keras.callbacks import Callback, EarlyStopping
+from tensorflow.keras.optimizers import Adam
 from backend.models.lstmDb import lstmInfo
+from backend.services.model_registry import ModelLease, get_model_registry
+from backend.services.lazy_models import FORECAST_MODES
+from backend.services.artifact_store import current_bundle, get_artifact_store, model_ref, save_keras_model
+from backend.services.lstm_config import (
+    MAX_LOOKBACK, TRAIN_SPLIT, parse_horizon, direct_weights_path, restore_scaler, prepare_frame, forecast_index,
+    training_fingerprint
+)
+from backend.services.numpy_lstm import numpy_layer_spec
+from backend.services.training_telemetry import current_rss_mb
 import warnings
 import os
 import tensorflow as tf
@@ -24,131 +36,445 @@ warnings.filterwarnings("ignore", category=UserWarning)
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 tf.get_logger().setLevel('ERROR')
 
-def parse_horizon(horizon_str):
-    if horizon_str.endswith('d'):
-        return int(horizon_str[:-1])
-    elif horizon_str.endswith('mo'):
-        return int(horizon_str[:-2]) * 30
-    elif horizon_str.endswith('yr'):
-        return int(horizon_str[:-2]) * 365
-    else:
-        return int(horizon_str)
+# Incremental retrains fine-tune on the new windows plus this many replayed old ones
+INCREMENTAL_EPOCHS = 5
+INCREMENTAL_REPLAY_WINDOWS = 64
+TRAIN_BATCH_SIZE = int(os.getenv("TRAIN_BATCH_SIZE", "32"))
+TRAIN_EPOCHS = int(os.getenv("TRAIN_EPOCHS", "50"))
+# Seed of the per-epoch shuffle of training window start indices
+TRAIN_SHUFFLE_SEED = 42
+# Quantiles reported for every column when a forecast is asked for uncertainty samples
+UNCERTAINTY_QUANTILES = (0.05, 0.5, 0.95)
+# Bump when a code change alters what an identical request would train, so old fingerprints stop matching
+TRAINING_FINGERPRINT_VERSION = 1
+
+def create_sequences(data, lookback=60, horizon=None):
+    """
+    Windows of `lookback` rows (X) and the row following each window (y).
+    With a horizon, y is instead the next `horizon` rows after each window.
+    X is a read-only strided view over data, so building it copies nothing;
+    use np.ascontiguousarray on a slice of it if the windows must be writable.
+    """
+    data = np.asarray(data)
+    n_windows = len(data) - lookback - (horizon or 1) + 1
+    if n_windows <= 0:
+        return np.array([]), np.array([])
+    X = np.moveaxis(sliding_window_view(data, lookback, axis=0)[:n_windows], -1, 1)
+    if horizon is None:
+        return X, data[lookback:]
+    return X, np.moveaxis(sliding_window_view(data[lookback:], horizon, axis=0), -1, 1)
+
 
-def create_sequences(data, lookback=60):
-    X, y = [], []
+def window_dataset(series, lookback, horizon=None, shuffle_seed=None):
+    """
+    (window, target) pairs cut from the raw series inside tf.data, in the same
+    order as create_sequences; only the series itself is held in memory. With a
+    shuffle_seed the window start indices are shuffled (and reshuffled every
+    epoch) before any window is cut, so shuffling never materializes windows.
+    """
+    series = tf.constant(np.asarray(series, dtype=np.float32))
+    target_len = horizon or 1
+    n_windows = max(int(series.shape[0]) - lookback - target_len + 1, 0)
+
+    def cut(start):
+        window = series[start:start + lookback]
+        if horizon is None:
+            return window, series[start + lookback]
+        return window, series[start + lookback:start + lookback + horizon]
 
-    for i in range(lookback, len(data)):
-        X.append(data[i-lookback:i])
-        y.append(data[i])
-    return np.array(X), np.array(y)
+    starts = tf.data.Dataset.range(n_windows)
+    if shuffle_seed is not None:
+        starts = starts.cache().shuffle(max(n_windows, 1), seed=shuffle_seed, reshuffle_each_iteration=True)
+    return starts.map(cut, num_parallel_calls=tf.data.AUTOTUNE)
 
-def build_lstm_model(input_shape, n_features):
+def training_dataset(pairs, batch_size=TRAIN_BATCH_SIZE, threads=None):
+    """
+    Batched and prefetched training input over pairs that are already shuffled
+    (window_dataset with a shuffle_seed); threads bounds the pipeline's own
+    thread pool so side-by-side jobs do not oversubscribe the cores.
+    """
+    pairs = pairs.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+    if threads:
+        options = tf.data.Options()
+        options.threading.private_threadpool_size = threads
+        options.threading.max_intra_op_parallelism = 1
+        pairs = pairs.with_options(options)
+    return pairs
+
+def configure_threads(threads):
+    """
+    Cap TensorFlow's op thread pools. This only takes effect before the runtime
+    starts, so long-lived processes should set it once (the training pool does so
+    per worker); later calls keep the existing pools.
+    """
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
+    except RuntimeError:
+        print(f"TensorFlow runtime already started; keeping its thread pools (requested {threads})")
+
+def build_lstm_model(input_shape, n_features, horizon=None, units=50, dropout=0.2, learning_rate=None):
+    """
+    Without a horizon the network predicts the next bar; with one, its head
+    emits all `horizon` bars at once as a (horizon, n_features) output.
+    units, dropout and learning_rate default to the production settings and
+    are only varied by the hyperparameter search.
+    """
+    if horizon is None:
+        head = [Dense(n_features)]
+    else:
+        head = [Dense(horizon * n_features), Reshape((horizon, n_features))]
     model = Sequential([
-        LSTM(50, return_sequences=True, input_shape=input_shape),
-        Dropout(0.2),
-        LSTM(50, return_sequences=False),
-        Dropout(0.2),
+        LSTM(units, return_sequences=True, input_shape=input_shape),
+        Dropout(dropout),
+        LSTM(units, return_sequences=False),
+        Dropout(dropout),
         Dense(25, activation='relu'),
-        Dense(n_features)
+        *head
     ])
-    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    optimizer = 'adam' if learning_rate is None else Adam(learning_rate=learning_rate)
+    model.compile(optimizer=optimizer, loss='mse', metrics=['mae'])
     return model
 
-def trainModel(historical_data, horizon, ticker='AAPL', weights_path=None):
+@tf.function(reduce_retracing=True)
+def _rollout(model, window, steps, training=False):
+    # Autograph turns the tf.range loop into a graph while_loop, so the whole
+    # recursive forecast is one call instead of a model.predict per step.
+    # Every row of window is rolled forward side by side: (steps, batch, n_features)
+    outputs = tf.TensorArray(tf.float32, size=steps)
+    for i in tf.range(steps):
+        next_pred = model(window, training=training)
+        outputs = outputs.write(i, next_pred)
+        window = tf.concat([window[:, 1:], next_pred[:, tf.newaxis]], axis=1)
+    return outputs.stack()
+
+def recursive_forecast(model, sequence, steps):
+    """Feed each predicted bar back into the window for `steps` steps"""
+    window = tf.convert_to_tensor(sequence[np.newaxis], dtype=tf.float32)
+    return _rollout(model, window, tf.constant(steps, dtype=tf.int32)).numpy()[:, 0]
+
+def dropout_samples(model, sequence, steps, mode, samples):
     """
-    weights_path: optional string path to save/load model weights, e.g., 'AAPL_lstm_weights.h5'
+    Monte Carlo dropout: `samples` forecast paths with dropout left on, run as
+    one batch so each step is a single forward pass over all of them.
+    Returns scaled paths shaped (samples, steps, n_features).
     """
-    df = pd.DataFrame(historical_data)
-    df['Date'] = pd.to_datetime(df['Date'])
-    df.set_index('Date', inplace=True)
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-    df = df.fillna(method='ffill').fillna(method='bfill')
+    window = tf.convert_to_tensor(np.repeat(sequence[np.newaxis], samples, axis=0), dtype=tf.float32)
+    if mode == 'direct':
+        return model(window, training=True).numpy()
+    paths = _rollout(model, window, tf.constant(steps, dtype=tf.int32), training=True)
+    return tf.transpose(paths, [1, 0, 2]).numpy()
 
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(df.values)
+def uncertainty_bands(paths, scaler, columns, quantiles=UNCERTAINTY_QUANTILES):
+    """Per-step quantiles of sampled paths in price units, as <column>_q<percent> columns"""
+    prices = scaler.inverse_transform(paths.reshape(-1, paths.shape[-1])).reshape(paths.shape)
+    bands = {}
+    for q in quantiles:
+        values = np.quantile(prices, q, axis=0)
+        for i, column in enumerate(columns):
+            bands[f"{column}_q{round(q * 100):02d}"] = values[:, i]
+    return pd.DataFrame(bands)
 
-    train_size = int(len(scaled_data) * 0.8) # here send the remaning data to test script
-    train_data = scaled_data[:train_size]
-    test_data = scaled_data[train_size:]
+def forecast_frame(model, last_window, steps, mode, scaler, df, uncertainty_samples=0):
+    """
+    Forecast `steps` business days past the end of df from its scaled last window.
+    With uncertainty_samples, quantile bands from that many dropout samples are
+    added next to the point forecast.
+    """
+    if mode == 'direct':
+        forecast = model(last_window[np.newaxis].astype(np.float32), training=False).numpy()[0]
+    else:
+        forecast = recursive_forecast(model, last_window, steps)
+    forecast_df = pd.DataFrame(scaler.inverse_transform(forecast), columns=df.columns)
+    if uncertainty_samples:
+        paths = dropout_samples(model, last_window, steps, mode, uncertainty_samples)
+        forecast_df = forecast_df.join(uncertainty_bands(paths, scaler, df.columns))
+    forecast_df.index = forecast_index(df, steps)
+    return forecast_df
 
-    lookback = min(60, len(train_data) // 2)
-    X_train, y_train = create_sequences(train_data, lookback)
-    X_test, y_test = create_sequences(test_data, lookback) if len(test_data) > lookback else (None, None)
+class TrainingTelemetry(Callback):
+    """Per-epoch wall time, throughput and loss of one fit() call, plus RSS sampled after every batch"""
 
-    n_features = df.shape[1]
-    model = build_lstm_model((lookback, n_features), n_features)
+    def __init__(self, n_samples):
+        super().__init__()
+        self.n_samples = n_samples
+        self.epoch_seconds = []
+        self.loss_curve = []
+        self.fit_seconds = 0.0
+        self.rss_before_fit_mb = None
+        self.fit_peak_rss_mb = None
 
-    # --- Load existing weights if available ---
-    if weights_path is not None and os.path.exists(weights_path):
-        model.load_weights(weights_path)
-        print(f"Loaded existing weights from {weights_path}")
+    def _sample_rss(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.fit_peak_rss_mb = max(self.fit_peak_rss_mb or 0.0, rss)
+        return rss
 
-    early_stop = EarlyStopping(monitor='loss', patience=10, restore_best_weights=True)
+    def on_train_begin(self, logs=None):
+        self.rss_before_fit_mb = self._sample_rss()
+        self._fit_started = time.perf_counter()
 
-    history = model.fit(
-        X_train, y_train,
-        epochs=50,
-        batch_size=32,
-        callbacks=[early_stop],
-        verbose=0
-    )
+    def on_train_batch_end(self, batch, logs=None):
+        self._sample_rss()
 
-    # --- Save weights after training ---
-    if weights_path is not None:
-    # Ensure directory exists
-        weights_dir = os.path.dirname(weights_path)
-        if weights_dir and not os.path.exists(weights_dir):
-            os.makedirs(weights_dir, exist_ok=True)
-            print(f"Created directory for weights: {weights_dir}")
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_started = time.perf_counter()
 
-    model.save_weights(weights_path)
-    print(f"Saved model weights to {weights_path}")
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_seconds.append(time.perf_counter() - self._epoch_started)
+        self.loss_curve.append(float((logs or {}).get('loss', np.nan)))
 
-    # Forecasting
+    def on_train_end(self, logs=None):
+        self.fit_seconds = time.perf_counter() - self._fit_started
+
+    def summary(self):
+        return {
+            "fit_seconds": self.fit_seconds,
+            "epoch_seconds": self.epoch_seconds,
+            "samples_per_second": [self.n_samples / seconds for seconds in self.epoch_seconds if seconds > 0],
+            "loss_curve": self.loss_curve,
+            "rss_before_fit_mb": self.rss_before_fit_mb,
+            "fit_peak_rss_mb": self.fit_peak_rss_mb
+        }
+
+def error_metrics(model, X, y, scaler, n_features):
+    """RMSE, MAE and MAPE in price units; direct targets are flattened so every forecast bar counts as one row"""
+    predictions = scaler.inverse_transform(model.predict(X, verbose=0).reshape(-1, n_features))
+    actual = scaler.inverse_transform(y.reshape(-1, n_features))
+    rmse = np.sqrt(mean_squared_error(actual, predictions))
+    mae = mean_absolute_error(actual, predictions)
+    mape = np.mean(np.abs((actual - predictions) / actual)) * 100
+    return rmse, mae, mape
+
+def incremental_checkpoint(weights_path, mode, df):
+    """
+    The current bundle's manifest to fine-tune from, or None when incremental training
+    is not possible (nothing saved yet, an older checkpoint, or a different network shape)
+    """
+    bundle_id = current_bundle(weights_path)
+    if bundle_id is None:
+        return None
+    config = get_artifact_store().manifest(bundle_id)
+    if config.get('last_trained_date') is None or config['forecast_mode'] != mode:
+        return None
+    if config['n_features'] != df.shape[1]:
+        return None
+    if len(df) < config['lookback'] + (config['horizon_steps'] or 1):
+        return None
+    return config
+
+def incremental_windows(scaled_data, dates, lookback, target_steps, last_trained_date, seed=42):
+    """
+    Split the windows into those whose targets reach past last_trained_date and a
+    random replay sample of the already-trained ones, which keeps the fine-tune
+    from forgetting older regimes
+    """
+    X, y = create_sequences(scaled_data, lookback, target_steps)
+    last_target_dates = dates[lookback + (target_steps or 1) - 1:][:len(X)]
+    is_new = np.asarray(last_target_dates > pd.Timestamp(last_trained_date))
+    new_rows = np.flatnonzero(is_new)
+    old_rows = np.flatnonzero(~is_new)
+    replay_rows = np.random.default_rng(seed).choice(
+        old_rows, size=min(len(old_rows), INCREMENTAL_REPLAY_WINDOWS), replace=False
+    )
+    return X, y, new_rows, np.sort(replay_rows)
+
+def memoized_training(fingerprint, weights_path):
+    """
+    The stored result of an earlier run with this fingerprint, as trainModel
+    returns it, provided the model is still served from the bundle it saved
+    """
+    record = lstmInfo.objects(fingerprint=fingerprint).first()
+    if record is None:
+        return None
+    if weights_path is not None and current_bundle(weights_path) != record.weights_file:
+        return None
+    forecast_df = pd.DataFrame(record.forecast_data).set_index('index')
+    forecast_df.index = pd.DatetimeIndex(forecast_df.index)
+    forecast_df.index.name = None
+    return forecast_df, {**record.model_info, "memoized": True}, record
+
+def trainModel(historical_data, horizon, ticker='AAPL', weights_path=None, mode='recursive', incremental=False,
+               batch_size=TRAIN_BATCH_SIZE, epochs=TRAIN_EPOCHS, threads=None, force=False, uncertainty_samples=0):
+    """
+    weights_path: optional name to save/load the model under in the artifact store, e.g. 'AAPL_lstm'
+          (a legacy path such as 'backend/weights/AAPL_lstm.weights.h5' names the same model)
+    mode: 'recursive' rolls a next-bar model forward step by step, 'direct' trains
+          a model that outputs the whole horizon in one forward pass
+    incremental: fine-tune the saved model on only the bars after its last training
+          date (plus a replay sample), reusing its scaler; falls back to a full
+          training when there is no usable checkpoint
+    batch_size, epochs: training batch size and maximum epochs (incremental runs use INCREMENTAL_EPOCHS)
+    threads: cap on the CPU threads this job's input pipeline and, if TF has not started yet, its ops use
+    force: retrain even when an earlier run had the same bars and config (see memoized_training)
+    uncertainty_samples: number of Monte Carlo dropout paths behind the forecast's quantile bands (0 for none)
+    """
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Unknown forecast mode {mode!r}, expected one of {FORECAST_MODES}")
+    if threads:
+        configure_threads(threads)
     steps = parse_horizon(horizon)
-    forecast = []
-    current_sequence = scaled_data[-lookback:].copy()
-    for _ in range(steps):
-        current_batch = current_sequence.reshape(1, lookback, n_features)
-        next_pred = model.predict(current_batch, verbose=0)[0]
-        forecast.append(next_pred)
-        current_sequence = np.vstack([current_sequence[1:], next_pred])
+    df = prepare_frame(historical_data)
+    if mode == 'direct':
+        weights_path = direct_weights_path(weights_path, steps)
 
-    forecast = np.array(forecast)
-    forecast_original = scaler.inverse_transform(forecast)
+    fingerprint = training_fingerprint(
+        df, ticker=ticker, horizon=horizon, mode=mode, incremental=incremental, batch_size=batch_size,
+        epochs=epochs, weights_path=weights_path, uncertainty_samples=uncertainty_samples,
+        version=TRAINING_FINGERPRINT_VERSION
+    )
+    if not force:
+        memoized = memoized_training(fingerprint, weights_path)
+        if memoized is not None:
+            print(f"Input and config unchanged for {ticker}, reusing training run {memoized[2].id}")
+            return memoized
 
-    forecast_df = pd.DataFrame(forecast_original, columns=df.columns)
-    last_date = df.index[-1]
-    forecast_df.index = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=steps, freq='B')
+    checkpoint = incremental_checkpoint(weights_path, mode, df) if incremental else None
+    if incremental and checkpoint is None:
+        print(f"No incremental checkpoint for {ticker}, running a full training")
 
-    # Metrics
-    if X_test is not None and len(X_test) > 0:
-        test_predictions = model.predict(X_test, verbose=0)
-        test_pred_original = scaler.inverse_transform(test_predictions)
-        test_actual_original = scaler.inverse_transform(y_test)
-        rmse = np.sqrt(mean_squared_error(test_actual_original, test_pred_original))
-        mae = mean_absolute_error(test_actual_original, test_pred_original)
-        mape = np.mean(np.abs((test_actual_original - test_pred_original) / test_actual_original)) * 100
+    # Scaling and window setup; tf.data cuts the training windows lazily during fit
+    sequence_started = time.perf_counter()
+    if checkpoint is not None:
+        scaler = restore_scaler(checkpoint)
+        scaled_data = scaler.transform(df.values)
+        lookback = checkpoint['lookback']
+        target_steps = checkpoint['horizon_steps']
+        X_all, y_all, new_rows, replay_rows = incremental_windows(
+            scaled_data, df.index, lookback, target_steps, checkpoint['last_trained_date']
+        )
+        fit_rows = np.concatenate([new_rows, replay_rows])
+        X_train, y_train = X_all[fit_rows], y_all[fit_rows]
+        train_pairs = tf.data.Dataset.from_tensor_slices(
+            (X_train.astype(np.float32), y_train.astype(np.float32))
+        ).shuffle(max(len(fit_rows), 1), seed=TRAIN_SHUFFLE_SEED, reshuffle_each_iteration=True)
+        # New windows are scored before the fine-tune sees them, so metrics stay out of sample
+        eval_rows = new_rows if len(new_rows) else replay_rows
+        X_test, y_test = X_all[eval_rows], y_all[eval_rows]
+        train_size, test_size = len(fit_rows), len(eval_rows)
     else:
-        train_predictions = model.predict(X_train, verbose=0)
-        train_pred_original = scaler.inverse_transform(train_predictions)
-        train_actual_original = scaler.inverse_transform(y_train)
-        rmse = np.sqrt(mean_squared_error(train_actual_original, train_pred_original))
-        mae = mean_absolute_error(train_actual_original, train_pred_original)
-        mape = np.mean(np.abs((train_actual_original - train_pred_original) / train_actual_original)) * 100
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaled_data = scaler.fit_transform(df.values)
+
+        train_size = int(len(scaled_data) * TRAIN_SPLIT) # here send the remaning data to test script
+        test_size = len(scaled_data) - train_size
+        train_data = scaled_data[:train_size]
+        test_data = scaled_data[train_size:]
+
+        if mode == 'direct':
+            target_steps = steps
+            lookback = min(MAX_LOOKBACK, (len(train_data) - steps) // 2)
+            if lookback < 1:
+                raise ValueError(
+                    f"Direct forecasting {steps} steps ahead needs more than {len(train_data)} training rows"
+                )
+        else:
+            target_steps = None
+            lookback = min(MAX_LOOKBACK, len(train_data) // 2)
+        X_train, y_train = create_sequences(train_data, lookback, target_steps)
+        train_pairs = window_dataset(train_data, lookback, target_steps, shuffle_seed=TRAIN_SHUFFLE_SEED)
+        X_test, y_test = create_sequences(test_data, lookback, target_steps)
+        if len(X_test) == 0:
+            X_test, y_test = None, None
+    sequence_build_seconds = time.perf_counter() - sequence_started
+
+    n_features = df.shape[1]
+    registry = get_model_registry()
+    key = (ticker, lookback, n_features, target_steps)
+    build = lambda: build_lstm_model((lookback, n_features), n_features, target_steps)
+    # Without a weights_path nothing identifies the weights a warm model holds,
+    # so such runs always start from a freshly initialized model
+    lease = registry.checkout(key, build, for_training=True) if weights_path is not None else ModelLease(key, build())
+    model = lease.model
+
+    # --- Load existing weights unless the warm model already holds them ---
+    on_disk_version = current_bundle(weights_path)
+    if on_disk_version is not None and on_disk_version != lease.weights_version:
+        model.set_weights(get_artifact_store().load(on_disk_version).weights)
+        print(f"Loaded existing weights from bundle {on_disk_version}")
+    elif lease.warm:
+        print(f"Reusing warm model for {ticker} from the model registry")
+
+    predict_seconds = 0.0
+    if checkpoint is not None:
+        predict_started = time.perf_counter()
+        rmse, mae, mape = error_metrics(model, X_test, y_test, scaler, n_features)
+        predict_seconds += time.perf_counter() - predict_started
+        print(f"Fine-tuning {ticker} on {len(new_rows)} new and {len(replay_rows)} replayed windows")
+        epochs = INCREMENTAL_EPOCHS if len(new_rows) else 0
+
+    losses = []
+    telemetry = TrainingTelemetry(len(X_train))
+    if epochs:
+        early_stop = EarlyStopping(monitor='loss', patience=10, restore_best_weights=True)
+
+        history = model.fit(
+            training_dataset(train_pairs, batch_size=batch_size, threads=threads),
+            epochs=epochs,
+            callbacks=[early_stop, telemetry],
+            verbose=0
+        )
+        losses = history.history['loss']
+    # A fine-tune with no new windows leaves the checkpoint's training date as it was
+    last_trained_date = (
+        pd.Timestamp(checkpoint['last_trained_date']) if checkpoint is not None and not epochs else df.index[-1]
+    )
+
+    # --- Save weights, scaler and network shape as one bundle ---
+    bundle_id = None
+    if weights_path is not None:
+        bundle_id = save_keras_model(model, {
+            "ticker": ticker,
+            "features": list(df.columns),
+            "lookback": lookback,
+            "n_features": n_features,
+            "forecast_mode": mode,
+            "horizon_steps": target_steps,
+            "data_min": scaler.data_min_.tolist(),
+            "data_max": scaler.data_max_.tolist(),
+            "last_trained_date": last_trained_date.isoformat(),
+            "fingerprint": fingerprint,
+            "layers": numpy_layer_spec(model)
+        }, ref=model_ref(weights_path))
+        print(f"Saved model bundle {bundle_id} as {model_ref(weights_path)}")
+    lease.weights_version = bundle_id
+
+    # Forecasting
+    predict_started = time.perf_counter()
+    forecast_df = forecast_frame(model, scaled_data[-lookback:], steps, mode, scaler, df, uncertainty_samples)
+
+    # Metrics
+    if checkpoint is None:
+        if X_test is not None:
+            rmse, mae, mape = error_metrics(model, X_test, y_test, scaler, n_features)
+        else:
+            rmse, mae, mape = error_metrics(model, X_train, y_train, scaler, n_features)
+    predict_seconds += time.perf_counter() - predict_started
+
+    if weights_path is not None:
+        registry.checkin(lease)
 
     model_info = {
         "model_type": "LSTM",
+        "forecast_mode": mode,
         "lookback_period": lookback,
         "layers": str(model.summary()),
         "total_params": model.count_params(),
-        "epochs_trained": len(history.history['loss']),
-        "final_loss": float(history.history['loss'][-1]),
+        "epochs_trained": len(losses),
+        "batch_size": batch_size,
+        "final_loss": float(losses[-1]) if losses else None,
         "rmse": float(rmse),
         "mae": float(mae),
         "mape": float(mape),
         "train_size": train_size,
-        "test_size": len(scaled_data) - train_size
+        "test_size": test_size,
+        "incremental": checkpoint is not None,
+        "uncertainty_samples": uncertainty_samples,
+        "telemetry": {
+            **telemetry.summary(),
+            "sequence_build_seconds": sequence_build_seconds,
+            "predict_seconds": predict_seconds
+        }
     }
 
     forecast_list = forecast_df.reset_index().to_dict(orient="records")
@@ -156,8 +482,10 @@ def trainModel(historical_data, horizon, ticker='AAPL', weights_path=None):
         ticker=ticker,
         horizon=horizon,
         forecast_data=forecast_list,
-        model_info={**model_info, "weights_file": weights_path} if weights_path else model_info,
-        weights_file=weights_path
+        model_info={**model_info, "weights_file": bundle_id} if bundle_id else model_info,
+        weights_file=bundle_id,
+        last_trained_date=last_trained_date,
+        fingerprint=fingerprint
     )
     recordLSTM.save()
     print(f"Saved forecast to MongoDB with ID: {recordLSTM.id}")
@@ -176,3 +504,53 @@ def trainModel(historical_data, horizon, ticker='AAPL', weights_path=None):
     print(f"\n[SAVED] Forecast saved to MongoDB with ID: {recordLSTM.id}")
     print("==============================\n")   
     return forecast_df, model_info , recordLSTM
+
+def predictModel(historical_data, horizon, ticker='AAPL', weights_path=None, mode='recursive', uncertainty_samples=0):
+    """
+    Forecast from the bundle saved by a previous trainModel run, without training,
+    with quantile bands when uncertainty_samples is set (see forecast_frame).
+    Raises FileNotFoundError when no trained model is saved under weights_path.
+    """
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Unknown forecast mode {mode!r}, expected one of {FORECAST_MODES}")
+    steps = parse_horizon(horizon)
+    if mode == 'direct':
+        weights_path = direct_weights_path(weights_path, steps)
+    on_disk_version = current_bundle(weights_path)
+    if on_disk_version is None:
+        raise FileNotFoundError(f"No trained {mode} LSTM bundle for {ticker} at {weights_path}")
+    bundle = get_artifact_store().load(on_disk_version)
+    config = bundle.manifest
+
+    df = prepare_frame(historical_data)
+    lookback = config['lookback']
+    n_features = config['n_features']
+    target_steps = config['horizon_steps']
+    if config['features'] != list(df.columns):
+        raise ValueError(f"Model was trained on {config['features']}, got {list(df.columns)}")
+    if len(df) < lookback:
+        raise ValueError(f"Prediction needs the last {lookback} bars, got {len(df)}")
+    scaler = restore_scaler(config)
+
+    registry = get_model_registry()
+    lease = registry.checkout(
+        (ticker, lookback, n_features, target_steps),
+        lambda: build_lstm_model((lookback, n_features), n_features, target_steps)
+    )
+    if lease.weights_version != on_disk_version:
+        lease.model.set_weights(bundle.weights)
+        lease.weights_version = on_disk_version
+
+    last_window = scaler.transform(df.values[-lookback:])
+    forecast_df = forecast_frame(lease.model, last_window, steps, mode, scaler, df, uncertainty_samples)
+    registry.checkin(lease)
+
+    model_info = {
+        "model_type": "LSTM",
+        "forecast_mode": mode,
+        "lookback_period": lookback,
+        "weights_file": on_disk_version,
+        "uncertainty_samples": uncertainty_samples,
+        "retrained": False
+    }
+    return forecast_df, model_info
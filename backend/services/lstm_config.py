@@ -0,0 +1,83 @@
+"""
+TensorFlow-free pieces shared by the LSTM services
+
+Horizon parsing, the input frame, training fingerprints, model names and the
+saved scaler only need NumPy, pandas and scikit-learn, so a process that serves
+forecasts from a stored bundle can use them without loading TensorFlow.
+"""
+import os
+import json
+import math
+import hashlib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+from backend.services.artifact_store import split_weights_suffix
+
+def parse_horizon(horizon_str):
+    if horizon_str.endswith('d'):
+        return int(horizon_str[:-1])
+    elif horizon_str.endswith('mo'):
+        return int(horizon_str[:-2]) * 30
+    elif horizon_str.endswith('yr'):
+        return int(horizon_str[:-2]) * 365
+    else:
+        return int(horizon_str)
+
+# Longest input window a model looks back over, and the share of bars it trains on
+MAX_LOOKBACK = 60
+TRAIN_SPLIT = 0.8
+DEFAULT_HISTORY_PERIOD = "60d"
+# Each Monte Carlo dropout path is a full forecast, so requests are capped at this many
+MAX_UNCERTAINTY_SAMPLES = int(os.getenv("MAX_UNCERTAINTY_SAMPLES", "200"))
+
+def min_direct_rows(steps):
+    """Fewest bars a direct model for steps can train on: its training split must hold steps plus a 2-bar lookback"""
+    return math.ceil((steps + 2) / TRAIN_SPLIT)
+
+def history_period(horizon, mode):
+    """
+    Period to fetch for training or serving a model. Direct models predict the
+    whole horizon from one window, so they need enough bars for the horizon plus
+    a full lookback on each side of every training window; recursive models get
+    by with the default period.
+    """
+    if mode != 'direct':
+        return DEFAULT_HISTORY_PERIOD
+    bars = math.ceil((parse_horizon(horizon) + 2 * MAX_LOOKBACK) / TRAIN_SPLIT)
+    # Bars are trading days; allow for weekends and a handful of holidays
+    return f"{math.ceil(bars * 7 / 5) + 10}d"
+
+def direct_weights_path(weights_path, steps):
+    """Direct models have a horizon-sized head, so each horizon is saved as its own model"""
+    if weights_path is None:
+        return None
+    directory, name = os.path.split(weights_path)
+    stem, suffix = split_weights_suffix(name)
+    return os.path.join(directory, f"{stem}_direct{steps}{suffix}")
+
+def restore_scaler(config):
+    # Fitting on just the saved column minima and maxima reproduces the original scaler exactly
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaler.fit(np.array([config['data_min'], config['data_max']]))
+    return scaler
+
+def prepare_frame(historical_data):
+    df = pd.DataFrame(historical_data)
+    df['Date'] = pd.to_datetime(df['Date'])
+    df.set_index('Date', inplace=True)
+    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+    return df.fillna(method='ffill').fillna(method='bfill')
+
+def forecast_index(df, steps):
+    """Business days following the last bar of df"""
+    return pd.date_range(start=df.index[-1] + pd.Timedelta(days=1), periods=steps, freq='B')
+
+def training_fingerprint(df, **config):
+    """
+    Content hash of the input bars (values and dates) plus the training config;
+    two runs with the same fingerprint would fit the same model
+    """
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
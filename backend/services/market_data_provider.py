@@ -0,0 +1,209 @@
+"""
+Market data providers behind data_fetcher
+
+data_fetcher only talks to the MarketDataProvider interface, so the network
+backed yfinance implementation can be swapped for the file backed replay
+implementation (deterministic, network-free tests and benchmarks) or another
+vendor without touching the services.
+"""
+import os
+import json
+import time
+from typing import Dict, List, Optional
+import pandas as pd
+import yfinance as yf
+from backend.services.price_store import PRICE_COLUMNS, period_start
+from backend.utils.helpers import TokenBucket
+
+# Shared by every provider call in the process so bursts from threads, the
+# async layer and scheduler jobs together stay under the provider's limits
+_rate_limiter = TokenBucket(
+    rate=float(os.getenv("PROVIDER_RATE_PER_SECOND", "5")),
+    capacity=int(os.getenv("PROVIDER_BURST", "10"))
+)
+
+
+def get_rate_limiter() -> TokenBucket:
+    return _rate_limiter
+
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
+
+
+class MarketDataProvider:
+    """
+    Interface for market data sources. history() returns a frame with a Date
+    column followed by Open/High/Low/Close/Volume; news() returns raw news items
+    in the yfinance layout ({"content": {"title", "summary", "pubDate", ...}}).
+    """
+
+    def now(self) -> pd.Timestamp:
+        """Reference time used to turn periods into start dates"""
+        return pd.Timestamp.now(tz="UTC")
+
+    def history(self, ticker: str, period: Optional[str] = None, start: Optional[str] = None,
+                end: Optional[str] = None) -> pd.DataFrame:
+        """Bars for a period, or from start (inclusive) to end (exclusive, default now)"""
+        raise NotImplementedError
+
+    def history_many(self, tickers: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        """History for several tickers; providers with a batch endpoint override this"""
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.history(ticker, period=period)
+            except Exception as e:
+                print(f"Error fetching history for {ticker}:", e)
+        return frames
+
+    def news(self, ticker: str) -> list:
+        raise NotImplementedError
+
+    def latest_quote(self, ticker: str) -> Optional[float]:
+        hist = self.history(ticker, period="1d")
+        return float(hist['Close'].iloc[-1]) if not hist.empty else None
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance; every request first takes a token from the rate limiter"""
+
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None):
+        self.rate_limiter = rate_limiter or _rate_limiter
+
+    def history(self, ticker: str, period: Optional[str] = None, start: Optional[str] = None,
+                end: Optional[str] = None) -> pd.DataFrame:
+        self.rate_limiter.acquire()
+        kwargs = {"start": start, "end": end} if start is not None else {"period": period}
+        hist = yf.Ticker(ticker).history(**kwargs)
+        hist.reset_index(inplace=True)
+        return hist[PRICE_COLUMNS]
+
+    def history_many(self, tickers: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        # yf.download issues one request per ticker, so every ticker pays a token and
+        # a batch is downloaded in chunks no larger than the bucket's burst
+        chunk_size = self.rate_limiter.capacity
+        frames = {}
+        for offset in range(0, len(tickers), chunk_size):
+            chunk = tickers[offset:offset + chunk_size]
+            for _ in chunk:
+                self.rate_limiter.acquire()
+            raw = yf.download(
+                chunk, period=period, group_by='ticker', threads=True,
+                auto_adjust=True, ignore_tz=False, progress=False
+            )
+            for ticker in chunk:
+                if raw is None or raw.empty or ticker not in raw.columns.get_level_values(0):
+                    continue
+                hist = raw[ticker].dropna(subset=['Close']).copy()
+                hist.index.name = 'Date'
+                hist.reset_index(inplace=True)
+                frames[ticker] = hist[PRICE_COLUMNS]
+        return frames
+
+    def news(self, ticker: str) -> list:
+        self.rate_limiter.acquire()
+        return yf.Ticker(ticker).news or []
+
+    def latest_quote(self, ticker: str) -> Optional[float]:
+        self.rate_limiter.acquire()
+        price = yf.Ticker(ticker).fast_info.last_price
+        return float(price) if price is not None else None
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves bars and news from a directory of files:
+        {root}/{TICKER}.csv or {TICKER}.parquet   OHLCV bars with a Date column
+        {root}/{TICKER}_news.json                 list of yfinance-style news items
+    "Now" is the last bar across all files unless given explicitly, so periods
+    resolve the same way on every run. latency (seconds) is slept before each
+    call to mimic a remote provider, and an optional rate_limiter throttles
+    calls the way the live provider would.
+    """
+
+    def __init__(self, root: str, latency: float = 0.0, now: Optional[str] = None,
+                 rate_limiter: Optional[TokenBucket] = None):
+        self.root = root
+        self.latency = latency
+        self.rate_limiter = rate_limiter
+        self._now = pd.Timestamp(now, tz="UTC") if now else None
+        self._bars: Dict[str, pd.DataFrame] = {}
+
+    def _wait(self) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _load_bars(self, ticker: str) -> pd.DataFrame:
+        if ticker not in self._bars:
+            csv_path = os.path.join(self.root, f"{ticker}.csv")
+            parquet_path = os.path.join(self.root, f"{ticker}.parquet")
+            if os.path.exists(parquet_path):
+                df = pd.read_parquet(parquet_path)
+            elif os.path.exists(csv_path):
+                df = pd.read_csv(csv_path)
+            else:
+                df = pd.DataFrame(columns=PRICE_COLUMNS)
+            df['Date'] = pd.to_datetime(df['Date'], utc=True)
+            self._bars[ticker] = df[PRICE_COLUMNS].sort_values('Date').reset_index(drop=True)
+        return self._bars[ticker]
+
+    def now(self) -> pd.Timestamp:
+        if self._now is None:
+            last_dates = [
+                self._load_bars(os.path.splitext(name)[0])['Date'].max()
+                for name in os.listdir(self.root)
+                if name.endswith((".csv", ".parquet"))
+            ]
+            last_dates = [date for date in last_dates if pd.notna(date)]
+            self._now = max(last_dates) if last_dates else super().now()
+        return self._now
+
+    def history(self, ticker: str, period: Optional[str] = None, start: Optional[str] = None,
+                end: Optional[str] = None) -> pd.DataFrame:
+        self._wait()
+        bars = self._load_bars(ticker)
+        start_ts = _utc(start) if start is not None else period_start(period or "max", now=self.now())
+        if start_ts is not None:
+            bars = bars[bars['Date'] >= start_ts]
+        if start is not None and end is not None:
+            bars = bars[bars['Date'] < _utc(end)]
+        return bars.reset_index(drop=True).copy()
+
+    def news(self, ticker: str) -> list:
+        self._wait()
+        path = os.path.join(self.root, f"{ticker}_news.json")
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return json.load(f)
+
+
+_provider = None
+
+
+def get_provider() -> MarketDataProvider:
+    """
+    Process-wide provider chosen by MARKET_DATA_PROVIDER ("yfinance" or "replay").
+    The replay provider reads REPLAY_DATA_DIR and sleeps REPLAY_LATENCY_MS per call.
+    """
+    global _provider
+    if _provider is None:
+        if os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower() == "replay":
+            _provider = ReplayProvider(
+                os.getenv("REPLAY_DATA_DIR", "replay_data"),
+                latency=float(os.getenv("REPLAY_LATENCY_MS", "0")) / 1000.0,
+                now=os.getenv("REPLAY_NOW") or None
+            )
+        else:
+            _provider = YFinanceProvider()
+    return _provider
+
+
+def set_provider(provider: Optional[MarketDataProvider]) -> None:
+    """Install a provider for the whole process; None falls back to the environment default"""
+    global _provider
+    _provider = provider
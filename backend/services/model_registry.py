@@ -0,0 +1,130 @@
+"""
+In-process registry of compiled Keras models
+
+Building and compiling the network and reloading its weights from disk is a
+fixed cost paid on every training or prediction request. The registry keeps
+recently used compiled models in memory and evicts the least recently used
+ones once a model count or memory cap is exceeded. Per-ticker models are keyed
+by (ticker, lookback, n_features, target_steps), target_steps being None for
+recursive models; the global model is keyed by (GLOBAL_TICKER, lookback,
+n_features, ordered ticker tuple).
+
+Only the architecture and weights are meant to stay warm: a training checkout
+recompiles the model with a fresh optimizer, so a run never continues from the
+Adam moments and step count the previous fit left behind.
+
+A model is leased exclusively: while one request trains on it, a concurrent
+request for the same key gets a freshly built instance, and whichever is
+checked in last stays warm. A lease that is never checked in (the fit raised)
+is simply dropped, since a failed fit can leave the model half trained.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+import numpy as np
+
+MODEL_REGISTRY_MAX_MODELS = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", "8"))
+MODEL_REGISTRY_MAX_MB = float(os.getenv("MODEL_REGISTRY_MAX_MB", "512"))
+
+
+def model_nbytes(model) -> int:
+    """Memory held by a model's weights plus its optimizer slots"""
+    variables = list(model.weights)
+    optimizer = getattr(model, "optimizer", None)
+    if optimizer is not None:
+        variables += list(optimizer.variables)
+    return int(sum(
+        int(np.prod(tuple(variable.shape))) * np.dtype(variable.dtype).itemsize
+        for variable in variables
+    ))
+
+
+def reset_optimizer(model) -> None:
+    """Recompile with a new instance of the same optimizer, dropping its slots and step count"""
+    model.compile_from_config(model.get_compile_config())
+
+
+class ModelLease:
+    """A model checked out of the registry; weights_version records which saved bundle its weights came from"""
+
+    def __init__(self, key: Hashable, model, weights_version=None, warm: bool = False):
+        self.key = key
+        self.model = model
+        self.weights_version = weights_version
+        self.warm = warm
+
+
+class ModelRegistry:
+    """LRU cache of compiled models bounded by count and estimated memory"""
+
+    def __init__(self, max_models: int = MODEL_REGISTRY_MAX_MODELS,
+                 max_bytes: float = MODEL_REGISTRY_MAX_MB * 1024 * 1024,
+                 sizeof: Callable = model_nbytes):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def checkout(self, key: Hashable, builder: Callable, for_training: bool = False) -> ModelLease:
+        """
+        Take the warm model for key out of the registry, or build one with
+        builder(). for_training resets a warm model's optimizer state.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+        if entry is not None:
+            model, weights_version, _ = entry
+            if for_training:
+                reset_optimizer(model)
+            return ModelLease(key, model, weights_version, warm=True)
+        return ModelLease(key, builder())
+
+    def checkin(self, lease: ModelLease) -> None:
+        """Return a leased model as the most recently used entry, then evict down to the caps"""
+        size = self.sizeof(lease.model)
+        with self._lock:
+            replaced = self._entries.pop(lease.key, None)
+            if replaced is not None:
+                self._bytes -= replaced[2]
+            self._entries[lease.key] = (lease.model, lease.weights_version, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_models or self._bytes > self.max_bytes):
+                evicted_key, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                print(f"[REGISTRY] Evicted model {evicted_key}")
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_model_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _model_registry
+
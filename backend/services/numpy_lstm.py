@@ -0,0 +1,163 @@
+"""
+Pure-NumPy forward pass for the per-ticker LSTM
+
+Forecasting only runs forward passes through the small network from
+build_lstm_model, so its model bundle also records which weight arrays belong
+to which layer. NumpyLSTM replays the same layers (Keras LSTM gate order
+i, f, c, o with sigmoid/tanh, dropout as identity) straight from the bundle's
+memory-mapped arrays and matches Keras to float32 tolerance, letting a serving
+process forecast without TensorFlow.
+"""
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from backend.services.artifact_store import ArtifactStore, current_bundle, get_artifact_store, weight_name
+from backend.services.lstm_config import (
+    parse_horizon, direct_weights_path, restore_scaler, prepare_frame, forecast_index
+)
+
+LAYER_PARAMS = {'LSTM': ('kernel', 'recurrent_kernel', 'bias'), 'Dense': ('kernel', 'bias')}
+
+
+def numpy_layer_spec(model):
+    """
+    The LSTM, Dense and Reshape layers of a model in order, naming each
+    parameter's array in model.get_weights() as save_keras_model stores it
+    """
+    spec = []
+    offset = 0
+    for layer in model.layers:
+        kind = type(layer).__name__
+        n_weights = len(layer.weights)
+        if kind in LAYER_PARAMS:
+            entry = {
+                "kind": kind.lower(),
+                "arrays": {name: weight_name(offset + i) for i, name in enumerate(LAYER_PARAMS[kind])}
+            }
+            if kind == 'Dense':
+                entry["activation"] = layer.get_config()['activation']
+            spec.append(entry)
+        elif kind == 'Reshape':
+            spec.append({"kind": "reshape", "shape": list(layer.target_shape)})
+        # Dropout is inactive at inference
+        offset += n_weights
+    return spec
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class NumpyLSTM:
+    """Forward pass of an exported build_lstm_model network"""
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """Raises ValueError when the bundle was not saved with a layer spec"""
+        spec = bundle.manifest.get('layers')
+        if not spec:
+            raise ValueError(f"Model bundle {bundle.bundle_id} has no NumPy layer spec")
+        layers = []
+        for entry in spec:
+            params = {name: bundle.arrays[array] for name, array in entry.get('arrays', {}).items()}
+            params.update({key: entry[key] for key in ('activation', 'shape') if key in entry})
+            layers.append((entry['kind'], params))
+        return cls(layers)
+
+    @staticmethod
+    def _lstm(x, params, return_sequences):
+        kernel, recurrent, bias = params['kernel'], params['recurrent_kernel'], params['bias']
+        units = recurrent.shape[0]
+        batch, steps, _ = x.shape
+        # The input projection does not depend on the state, so do it for every step at once
+        projected = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = []
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent
+            i, f, g, o = np.split(z, 4, axis=1)
+            c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+            h = _sigmoid(o) * np.tanh(c)
+            if return_sequences:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if return_sequences else h
+
+    def predict(self, X):
+        x = np.asarray(X, dtype=np.float32)
+        lstm_layers = [i for i, (kind, _) in enumerate(self.layers) if kind == 'lstm']
+        for i, (kind, params) in enumerate(self.layers):
+            if kind == 'lstm':
+                x = self._lstm(x, params, return_sequences=i != lstm_layers[-1])
+            elif kind == 'dense':
+                x = x @ params['kernel'] + params['bias']
+                if str(params['activation']) == 'relu':
+                    x = np.maximum(x, 0)
+                elif str(params['activation']) != 'linear':
+                    raise ValueError(f"Unsupported Dense activation {params['activation']}")
+            elif kind == 'reshape':
+                x = x.reshape((len(x), *params['shape']))
+        return x
+
+    def recursive_forecast(self, sequence, steps):
+        window = np.asarray(sequence, dtype=np.float32)[np.newaxis]
+        forecast = []
+        for _ in range(steps):
+            next_pred = self.predict(window)
+            forecast.append(next_pred[0])
+            window = np.concatenate([window[:, 1:], next_pred[:, np.newaxis]], axis=1)
+        return np.array(forecast)
+
+
+@lru_cache(maxsize=32)
+def _load_engine(root, bundle_id):
+    # Bundles are immutable, so an engine stays valid for as long as its id is cached
+    return NumpyLSTM.from_bundle(ArtifactStore(root).load(bundle_id))
+
+
+def predictNumpyModel(historical_data, horizon, ticker='AAPL', weights_path=None, mode='recursive'):
+    """
+    Same contract as lstmModel.predictModel, run on the current bundle's arrays.
+    Raises FileNotFoundError when there is no bundle with a NumPy layer spec.
+    """
+    steps = parse_horizon(horizon)
+    if mode == 'direct':
+        weights_path = direct_weights_path(weights_path, steps)
+    store = get_artifact_store()
+    bundle_id = current_bundle(weights_path, store)
+    if bundle_id is None:
+        raise FileNotFoundError(f"No trained {mode} LSTM bundle for {ticker} at {weights_path}")
+    try:
+        engine = _load_engine(store.root, bundle_id)
+    except ValueError as e:
+        raise FileNotFoundError(str(e))
+    config = store.manifest(bundle_id)
+
+    df = prepare_frame(historical_data)
+    lookback = config['lookback']
+    if config['features'] != list(df.columns):
+        raise ValueError(f"Model was trained on {config['features']}, got {list(df.columns)}")
+    if len(df) < lookback:
+        raise ValueError(f"Prediction needs the last {lookback} bars, got {len(df)}")
+    scaler = restore_scaler(config)
+
+    last_window = scaler.transform(df.values[-lookback:])
+    if mode == 'direct':
+        forecast = engine.predict(last_window[np.newaxis])[0]
+    else:
+        forecast = engine.recursive_forecast(last_window, steps)
+    forecast_df = pd.DataFrame(scaler.inverse_transform(forecast), columns=df.columns)
+    forecast_df.index = forecast_index(df, steps)
+
+    model_info = {
+        "model_type": "LSTM",
+        "forecast_mode": mode,
+        "lookback_period": lookback,
+        "weights_file": bundle_id,
+        "inference_engine": "numpy",
+        "retrained": False
+    }
+    return forecast_df, model_info
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from backend.models.portfolio import Portfolio, Position, Transaction
 from backend.services.data_fetcher import fetch
+from backend.services.quote_cache import get_quote_cache
 from backend.models.forecast import Forecast
 
 
@@ -24,37 +25,64 @@ def get_or_create_portfolio(portfolio_id: str = "default", initial_cash: float =
 
 
 def get_current_price(ticker: str) -> Optional[float]:
-    """Get current market price for a ticker"""
+    """Get current market price for a ticker, from the quote cache when it is fresh enough"""
+    quote_cache = get_quote_cache()
+    cached = quote_cache.get(ticker)
+    if cached is not None:
+        return cached
     try:
-        result = fetch(ticker=ticker, period="1d")
-        if result and result.get("success") and result.get("hist_df"):
+        result = fetch(ticker=ticker, period="1d", parts=("hist",), orient="frame")
+        if result and result.get("success"):
             hist_data = result.get("hist_df")
-            if hist_data and len(hist_data) > 0:
+            if hist_data is not None and len(hist_data) > 0:
                 # Get the most recent close price
-                latest = hist_data[-1]
-                return float(latest.get("Close", 0))
+                price = float(hist_data["Close"].iloc[-1])
+                quote_cache.put(ticker, price)
+                return price
     except Exception as e:
         print(f"Error fetching current price for {ticker}: {e}")
     return None
 
 
+def get_current_prices(tickers: List[str]) -> Dict[str, float]:
+    """Get current market prices for several tickers; cache misses share one batched fetch"""
+    quote_cache = get_quote_cache()
+    prices = {}
+    for ticker in tickers:
+        cached = quote_cache.get(ticker)
+        if cached is not None:
+            prices[ticker] = cached
+    missing = [ticker for ticker in tickers if ticker not in prices]
+    if missing:
+        try:
+            prices.update(quote_cache.refresh(missing))
+        except Exception as e:
+            print(f"Error fetching current prices for {missing}: {e}")
+    return prices
+
+
 def update_position_prices(portfolio: Portfolio) -> Portfolio:
     """Update current prices for all positions in portfolio"""
-    for position_ref in portfolio.positions:
-        position = Position.objects(id=position_ref.id).first()
-        if position:
-            current_price = get_current_price(position.ticker)
-            if current_price:
-                position.current_price = current_price
-                position.last_updated = datetime.utcnow()
-                position.save()
+    positions = [
+        position for position in
+        (Position.objects(id=position_ref.id).first() for position_ref in portfolio.positions)
+        if position
+    ]
+    prices = get_current_prices([position.ticker for position in positions]) if positions else {}
+    for position in positions:
+        current_price = prices.get(position.ticker)
+        if current_price:
+            position.current_price = current_price
+            position.last_updated = datetime.utcnow()
+            position.save()
     return Portfolio.objects(id=portfolio.id).first()
 
 
-def calculate_portfolio_value(portfolio: Portfolio) -> float:
+def calculate_portfolio_value(portfolio: Portfolio, update_prices: bool = True) -> float:
     """Calculate total portfolio value (cash + positions)"""
     total_positions_value = 0.0
-    portfolio = update_position_prices(portfolio)
+    if update_prices:
+        portfolio = update_position_prices(portfolio)
     
     for position_ref in portfolio.positions:
         position = Position.objects(id=position_ref.id).first()
@@ -241,10 +269,11 @@ def sell_asset(
         return {"success": False, "message": f"Error executing sell order: {str(e)}"}
 
 
-def get_portfolio_positions(portfolio_id: str = "default") -> List[Dict]:
+def get_portfolio_positions(portfolio_id: str = "default", update_prices: bool = True) -> List[Dict]:
     """Get all positions in the portfolio with current values"""
     portfolio = get_or_create_portfolio(portfolio_id)
-    portfolio = update_position_prices(portfolio)
+    if update_prices:
+        portfolio = update_position_prices(portfolio)
     
     positions = []
     for position_ref in portfolio.positions:
@@ -340,7 +369,7 @@ def get_portfolio_summary(portfolio_id: str = "default") -> Dict:
     """Get comprehensive portfolio summary with all metrics"""
     portfolio = get_or_create_portfolio(portfolio_id)
     portfolio = update_position_prices(portfolio)
-    portfolio.total_value = calculate_portfolio_value(portfolio)
+    portfolio.total_value = calculate_portfolio_value(portfolio, update_prices=False)
     
     # Calculate metrics
     total_return = ((portfolio.total_value - portfolio.initial_cash) / portfolio.initial_cash) * 100
@@ -373,7 +402,7 @@ def get_portfolio_summary(portfolio_id: str = "default") -> Dict:
     
     portfolio.save()
     
-    positions = get_portfolio_positions(portfolio_id)
+    positions = get_portfolio_positions(portfolio_id, update_prices=False)
     
     # Calculate allocation
     allocation = []
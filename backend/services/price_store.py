@@ -0,0 +1,172 @@
+"""
+Local on-disk OHLCV store used by data_fetcher to avoid re-downloading history
+
+Each ticker gets its own directory of append-only Parquet partitions plus a small
+JSON meta file recording which window the partitions cover and when the tail was
+last refreshed from the provider.
+"""
+import os
+import json
+import re
+import threading
+import time
+from typing import Dict, Optional, Union
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "prices")
+PRICE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Union[pd.Timestamp, None]:
+    """
+    Convert a yfinance style period ("60d", "1mo", "5y", "ytd", "max") into the
+    UTC timestamp of the first bar it covers. Returns None for "max".
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz="UTC")
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y|yr)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    value, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.Timedelta(days=value)
+    if unit == "wk":
+        return now - pd.Timedelta(weeks=value)
+    if unit == "mo":
+        return now - pd.DateOffset(months=value)
+    return now - pd.DateOffset(years=value)
+
+
+def _align_tz(df: pd.DataFrame, tz: Optional[str]) -> pd.DataFrame:
+    """Batched downloads can come back in a different timezone than single-ticker ones"""
+    dates = df['Date']
+    if tz is None or dates.dt.tz is None or str(dates.dt.tz) == tz:
+        return df
+    df = df.copy()
+    df['Date'] = dates.dt.tz_convert(tz)
+    return df
+
+
+class PriceStore:
+    """Append-only Parquet partitions per ticker"""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, max_partitions: int = 16):
+        self.root = root
+        self.max_partitions = max_partitions
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.upper())
+
+    def _meta_path(self, ticker: str) -> str:
+        return os.path.join(self._ticker_dir(ticker), "meta.json")
+
+    def _partitions(self, ticker: str) -> list:
+        ticker_dir = self._ticker_dir(ticker)
+        if not os.path.isdir(ticker_dir):
+            return []
+        return sorted(
+            os.path.join(ticker_dir, name)
+            for name in os.listdir(ticker_dir)
+            if name.startswith("part-") and name.endswith(".parquet")
+        )
+
+    def get_meta(self, ticker: str) -> dict:
+        try:
+            with open(self._meta_path(ticker), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def update_meta(self, ticker: str, **fields) -> dict:
+        with self._lock(ticker):
+            return self._update_meta(ticker, **fields)
+
+    def _update_meta(self, ticker: str, **fields) -> dict:
+        meta = self.get_meta(ticker)
+        meta.update(fields)
+        os.makedirs(self._ticker_dir(ticker), exist_ok=True)
+        tmp_path = self._meta_path(ticker) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(ticker))
+        return meta
+
+    def read(self, ticker: str, start: Optional[pd.Timestamp] = None) -> Union[pd.DataFrame, None]:
+        """Read all stored bars for a ticker, optionally only those at or after start"""
+        partitions = self._partitions(ticker)
+        if not partitions:
+            return None
+        df = pd.concat([pd.read_parquet(path) for path in partitions], ignore_index=True)
+        df = df.drop_duplicates(subset='Date', keep='last').sort_values('Date').reset_index(drop=True)
+        if start is not None:
+            df = df[df['Date'] >= start].reset_index(drop=True)
+        return df
+
+    def _write_partition(self, ticker: str, df: pd.DataFrame) -> None:
+        os.makedirs(self._ticker_dir(ticker), exist_ok=True)
+        name = f"part-{time.time_ns():020d}.parquet"
+        df[PRICE_COLUMNS].to_parquet(os.path.join(self._ticker_dir(ticker), name), index=False)
+
+    def append(self, ticker: str, df: pd.DataFrame) -> None:
+        """Append new bars as a partition; rows with an existing Date supersede the old ones"""
+        if df is None or df.empty:
+            return
+        with self._lock(ticker):
+            self._append(ticker, df)
+
+    def _append(self, ticker: str, df: pd.DataFrame) -> None:
+        tz = self.get_meta(ticker).get("tz")
+        self._write_partition(ticker, _align_tz(df, tz))
+        if tz is None and df['Date'].dt.tz is not None:
+            # First bars of a ticker that was backfilled before it was ever fetched
+            self._update_meta(ticker, tz=str(df['Date'].dt.tz))
+        if len(self._partitions(ticker)) > self.max_partitions:
+            self._compact(ticker)
+
+    def merge(self, ticker: str, df: pd.DataFrame, **meta) -> None:
+        """Append df and update the meta in one step, keeping whatever was stored outside df's window"""
+        with self._lock(ticker):
+            if not df.empty:
+                self._append(ticker, df)
+            self._update_meta(ticker, **meta)
+
+    def write(self, ticker: str, df: pd.DataFrame, **meta) -> None:
+        """Replace everything stored for a ticker with df; an unfinished backfill is forgotten with the old bars"""
+        with self._lock(ticker):
+            old_partitions = self._partitions(ticker)
+            self._write_partition(ticker, df)
+            for path in old_partitions:
+                os.remove(path)
+            tz = df['Date'].dt.tz
+            self._update_meta(ticker, tz=str(tz) if tz is not None else None, backfill=None, backfilled=[], **meta)
+
+    def _compact(self, ticker: str) -> None:
+        old_partitions = self._partitions(ticker)
+        df = self.read(ticker)
+        self._write_partition(ticker, df)
+        for path in old_partitions:
+            os.remove(path)
+
+
+_price_store = None
+
+
+def get_price_store() -> Union[PriceStore, None]:
+    """Process-wide store; set PRICE_STORE_DIR to an empty string to disable it"""
+    global _price_store
+    root = os.getenv("PRICE_STORE_DIR", DEFAULT_STORE_DIR)
+    if not root:
+        return None
+    if _price_store is None or _price_store.root != root:
+        _price_store = PriceStore(root)
+    return _price_store
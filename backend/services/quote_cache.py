@@ -0,0 +1,79 @@
+"""
+In-memory latest-quote cache kept warm by a background scheduler job
+
+get_current_price reads from here first, so order and summary endpoints only
+go to the provider when a quote is older than the staleness budget.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from backend.models.forecast import Forecast
+from backend.models.portfolio import Position
+from backend.services.async_fetcher import fetch_histories
+
+QUOTE_MAX_AGE_SECONDS = float(os.getenv("QUOTE_MAX_AGE_SECONDS", "120"))
+QUOTE_REFRESH_SECONDS = float(os.getenv("QUOTE_REFRESH_SECONDS", "60"))
+
+
+class QuoteCache:
+    """Latest close per ticker with the time it was observed"""
+
+    def __init__(self, max_age: float = QUOTE_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._quotes = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Cached price if it is younger than max_age (default: the cache's budget)"""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            entry = self._quotes.get(ticker)
+        if entry is None:
+            return None
+        price, observed_at = entry
+        return price if time.time() - observed_at <= max_age else None
+
+    def put(self, ticker: str, price: float) -> None:
+        with self._lock:
+            self._quotes[ticker] = (price, time.time())
+
+    def tickers(self) -> List[str]:
+        with self._lock:
+            return list(self._quotes)
+
+    def refresh(self, tickers: List[str]) -> Dict[str, float]:
+        """Re-price tickers with one batched fetch (plus retries for what it missed) and store the results"""
+        prices = {}
+        if not tickers:
+            return prices
+        for ticker, hist_df in fetch_histories(tickers, period="1d").items():
+            if hist_df is not None and not hist_df.empty:
+                prices[ticker] = float(hist_df["Close"].iloc[-1])
+                self.put(ticker, prices[ticker])
+        return prices
+
+
+_quote_cache = QuoteCache()
+
+
+def get_quote_cache() -> QuoteCache:
+    return _quote_cache
+
+
+def tracked_tickers() -> List[str]:
+    """Tickers worth keeping warm: open positions, forecast tickers and anything already quoted"""
+    tickers = set(_quote_cache.tickers())
+    tickers.update(position.ticker for position in Position.objects(quantity__gt=0).only("ticker"))
+    tickers.update(Forecast.objects.distinct("ticker"))
+    return sorted(tickers)
+
+
+def refresh_quotes_job():
+    """Scheduled job: refresh every tracked ticker's quote"""
+    try:
+        tickers = tracked_tickers()
+        prices = _quote_cache.refresh(tickers)
+        print(f"[QUOTES] Refreshed {len(prices)}/{len(tickers)} quotes")
+    except Exception as e:
+        print("Error refreshing quote cache:", e)
@@ -0,0 +1,202 @@
+"""
+Process pool that runs model training off the Flask request threads
+
+A training run holds the CPU for minutes, so it is submitted here instead of
+running inside the request or scheduler thread. Each worker process caps the
+threads TensorFlow may use, so TRAINING_WORKERS x TRAINING_THREADS_PER_JOB
+cores train while the rest stay free to serve reads. Workers are spawned
+rather than forked, since TensorFlow's thread pools do not survive a fork.
+
+Jobs return plain dicts (forecast records, model_info and the saved Forecast
+id) because Mongo documents do not travel between processes. Price history is
+fetched by the submitting process and passed in, so workers never touch the
+on-disk price store, whose locks only guard threads within one process.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+TRAINING_THREADS_PER_JOB = int(os.getenv("TRAINING_THREADS_PER_JOB", "2"))
+# Finished jobs (and their results) stay pollable for this long, then are dropped
+TRAINING_JOB_TTL_SECONDS = float(os.getenv("TRAINING_JOB_TTL_SECONDS", "3600"))
+
+
+def _init_worker(threads_per_job: int) -> None:
+    # Must run before TensorFlow is imported in this process
+    for name in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS"):
+        os.environ[name] = str(threads_per_job)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_job)
+    tf.config.threading.set_inter_op_parallelism_threads(threads_per_job)
+
+    from mongoengine import connect as mongo_connect
+    mongo_connect(host=os.getenv("MONGO_URI"))
+
+
+def _process_pool(max_workers: int, threads_per_job: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads_per_job,)
+    )
+
+
+def run_lstm_job(tickerName: str, horizon: str, historical_data, weights_path: str,
+                 forecast_mode: str = "recursive", incremental: bool = False,
+                 training_options: Optional[dict] = None) -> dict:
+    """
+    Train the LSTM on historical_data and save the Forecast; runs inside a worker process.
+    training_options are passed on to trainModel (batch_size, epochs, threads, force, uncertainty_samples).
+    """
+    from backend.models.forecast import Forecast
+    from backend.services.lstmModel import trainModel
+
+    forecast_df, model_info, recordLSTM = trainModel(
+        historical_data=historical_data,
+        horizon=horizon,
+        ticker=tickerName,
+        weights_path=weights_path,
+        mode=forecast_mode,
+        incremental=incremental,
+        **(training_options or {})
+    )
+
+    forecast_json = (
+        forecast_df.reset_index()
+        .rename(columns={"index": "Date"})
+        .to_dict(orient="records")
+    )
+
+    # A memoized run already has its Forecast; only a real training saves a new one
+    forecast_entry = Forecast.objects(lstm_model=recordLSTM).first() if model_info.get("memoized") else None
+    if forecast_entry is None:
+        forecast_entry = Forecast(
+            ticker=tickerName,
+            horizon=horizon,
+            forecast_data=forecast_json,
+            model_info=model_info,
+            lstm_model=recordLSTM
+        )
+        forecast_entry.save()
+    return {
+        "success": True,
+        "forecast": forecast_json,
+        "model_info": model_info,
+        "forecast_id": str(forecast_entry.id)
+    }
+
+
+def run_global_job(histories: dict, horizon: str, training_options: Optional[dict] = None) -> dict:
+    """
+    Train the global LSTM on histories (ticker -> bars) and save one Forecast per
+    member; runs inside a worker process. training_options are passed on to
+    trainGlobalModel (batch_size, epochs, threads).
+    """
+    from backend.models.forecast import Forecast
+    from backend.services.global_lstm import trainGlobalModel
+
+    forecasts, model_info, recordLSTM = trainGlobalModel(histories, horizon, **(training_options or {}))
+
+    forecast_json, forecast_ids = {}, {}
+    for ticker, forecast_df in forecasts.items():
+        records = forecast_df.reset_index().rename(columns={"index": "Date"}).to_dict(orient="records")
+        forecast_entry = Forecast(
+            ticker=ticker,
+            horizon=horizon,
+            forecast_data=records,
+            model_info=model_info,
+            lstm_model=recordLSTM
+        )
+        forecast_entry.save()
+        forecast_json[ticker] = records
+        forecast_ids[ticker] = str(forecast_entry.id)
+    return {
+        "success": True,
+        "forecast": forecast_json,
+        "model_info": model_info,
+        "forecast_ids": forecast_ids
+    }
+
+
+class TrainingExecutor:
+    """
+    Submits training jobs to a lazily started pool and tracks their futures by
+    job id until job_ttl seconds after they finish
+    """
+
+    def __init__(self, max_workers: int = TRAINING_WORKERS,
+                 threads_per_job: int = TRAINING_THREADS_PER_JOB,
+                 pool_factory: Callable = _process_pool,
+                 job_ttl: float = TRAINING_JOB_TTL_SECONDS):
+        self.max_workers = max_workers
+        self.threads_per_job = threads_per_job
+        self.pool_factory = pool_factory
+        self.job_ttl = job_ttl
+        self._pool = None
+        self._jobs: Dict[str, Future] = {}
+        self._finished: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _evict_expired(self) -> None:
+        # Caller holds the lock; a job's TTL runs from the first time it is seen finished
+        now = time.monotonic()
+        for job_id, future in self._jobs.items():
+            if future.done():
+                self._finished.setdefault(job_id, now)
+        cutoff = now - self.job_ttl
+        for job_id, finished_at in list(self._finished.items()):
+            if finished_at <= cutoff:
+                del self._finished[job_id]
+                self._jobs.pop(job_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired()
+            return len(self._jobs)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Tuple[str, Future]:
+        with self._lock:
+            self._evict_expired()
+            if self._pool is None:
+                self._pool = self.pool_factory(self.max_workers, self.threads_per_job)
+            job_id = f"train-{os.getpid()}-{next(self._ids)}"
+            future = self._pool.submit(fn, *args, **kwargs)
+            self._jobs[job_id] = future
+        return job_id, future
+
+    def get(self, job_id: str) -> Optional[Future]:
+        with self._lock:
+            self._evict_expired()
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Job state for polling: pending, running, done (with its result) or failed"""
+        future = self.get(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return {"job_id": job_id, "status": "running" if future.running() else "pending"}
+        error = future.exception()
+        if error is not None:
+            return {"job_id": job_id, "status": "failed", "error": str(error)}
+        return {"job_id": job_id, "status": "done", "result": future.result()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+_training_executor = TrainingExecutor()
+
+
+def get_training_executor() -> TrainingExecutor:
+    return _training_executor
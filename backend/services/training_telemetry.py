@@ -0,0 +1,58 @@
+"""
+Training telemetry stored on lstmInfo records
+
+trainModel records per-epoch wall time, throughput, the loss curve, sequence
+build and predict time and the RSS sampled before and during the fit under
+model_info["telemetry"]. RSS is sampled rather than read from getrusage, whose
+peak covers the worker's whole lifetime and so would report an earlier, larger
+job's memory against every later one. This module reads those records back and aggregates
+them per ticker, for hardware sizing and spotting regressions between runs.
+"""
+import os
+from collections import defaultdict
+from typing import Optional
+import numpy as np
+from backend.models.lstmDb import lstmInfo
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process right now, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _mean(values):
+    return float(np.mean(values)) if values else None
+
+
+def summarize_telemetry(ticker: Optional[str] = None, limit: int = 500) -> dict:
+    """Aggregate the telemetry of the latest `limit` training runs, keyed by ticker"""
+    query = lstmInfo.objects(ticker=ticker) if ticker else lstmInfo.objects()
+    runs = defaultdict(list)
+    for record in query.only("ticker", "model_info").order_by("-created_at").limit(limit):
+        telemetry = (record.model_info or {}).get("telemetry")
+        if telemetry:
+            runs[record.ticker].append(telemetry)
+
+    summary = {}
+    for name, telemetries in runs.items():
+        epoch_seconds = [s for t in telemetries for s in t.get("epoch_seconds", [])]
+        throughput = [s for t in telemetries for s in t.get("samples_per_second", [])]
+        summary[name] = {
+            "runs": len(telemetries),
+            "epochs": len(epoch_seconds),
+            "mean_epoch_seconds": _mean(epoch_seconds),
+            "p95_epoch_seconds": float(np.percentile(epoch_seconds, 95)) if epoch_seconds else None,
+            "mean_samples_per_second": _mean(throughput),
+            "mean_fit_seconds": _mean([t.get("fit_seconds", 0.0) for t in telemetries]),
+            "mean_sequence_build_seconds": _mean([t.get("sequence_build_seconds", 0.0) for t in telemetries]),
+            "mean_predict_seconds": _mean([t.get("predict_seconds", 0.0) for t in telemetries]),
+            "max_fit_peak_rss_mb": max(
+                (t["fit_peak_rss_mb"] for t in telemetries if t.get("fit_peak_rss_mb") is not None), default=None
+            )
+        }
+    return summary
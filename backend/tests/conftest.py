@@ -4,6 +4,7 @@ Pytest configuration and shared fixtures
 import sys
 import os
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from mongoengine import connect, disconnect
 
@@ -13,6 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app import app
 from backend.models.portfolio import Portfolio, Position, Transaction
 from backend.models.forecast import Forecast
+from backend.services.training_executor import TrainingExecutor
 
 # Test database configuration
 TEST_DB_NAME = "test_fintech_db"
@@ -35,6 +37,30 @@ def test_db():
         pass
 
 
+@pytest.fixture(autouse=True)
+def training_executor():
+    """Run training jobs on a thread so they share the test process and its mongomock connection"""
+    executor = TrainingExecutor(max_workers=1, pool_factory=lambda workers, threads: ThreadPoolExecutor(workers))
+    with patch("backend.routes.forecast.get_training_executor", return_value=executor):
+        yield executor
+    executor.shutdown()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def price_store(tmp_path_factory):
+    """Keep bars any test downloads out of backend/data/prices"""
+    with patch.dict(os.environ, {"PRICE_STORE_DIR": str(tmp_path_factory.mktemp("prices"))}):
+        yield
+
+
+@pytest.fixture
+def current_prices():
+    """Price every position at 150.0 so portfolio valuation never reaches the quote cache or the provider"""
+    with patch("backend.services.portfolio_service.get_current_prices") as prices:
+        prices.side_effect = lambda tickers: {ticker: 150.0 for ticker in tickers}
+        yield prices
+
+
 @pytest.fixture
 def client():
     """Flask test client"""
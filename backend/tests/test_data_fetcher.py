@@ -0,0 +1,464 @@
+"""
+Unit tests for the data fetching layer
+
+Bars and news are served by a ReplayProvider over a temporary directory, so
+none of these tests touch the network.
+"""
+import sys
+import os
+import json
+import pytest
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import data_fetcher
+from backend.services.market_data_provider import ReplayProvider, YFinanceProvider, set_provider
+from backend.services.price_store import PriceStore, period_start
+from backend.utils.helpers import TTLCache
+
+REPLAY_NOW = "2025-03-14"
+
+
+def make_bars(start, periods, tz="America/New_York"):
+    """Daily OHLCV bars with a Date column"""
+    dates = pd.date_range(start=start, periods=periods, freq="D", tz=tz, name="Date")
+    closes = [100.0 + i for i in range(periods)]
+    return pd.DataFrame({
+        "Open": closes,
+        "High": [c + 1 for c in closes],
+        "Low": [c - 1 for c in closes],
+        "Close": closes,
+        "Volume": [1000000 + i for i in range(periods)],
+    }, index=dates).reset_index()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    data_fetcher._ticker_validity.clear()
+    data_fetcher._news_cache.clear()
+    yield
+    data_fetcher._ticker_validity.clear()
+    data_fetcher._news_cache.clear()
+    set_provider(None)
+
+
+@pytest.fixture
+def price_store_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRICE_STORE_DIR", str(tmp_path / "prices"))
+    return tmp_path / "prices"
+
+
+@pytest.fixture
+def replay(tmp_path):
+    """ReplayProvider with 30 days of AAPL and MSFT bars ending on REPLAY_NOW"""
+    root = tmp_path / "replay"
+    root.mkdir()
+    make_bars("2025-02-13", 30, tz="UTC").to_csv(root / "AAPL.csv", index=False)
+    bars = make_bars("2025-02-13", 30, tz="UTC")
+    bars[["Open", "High", "Low", "Close"]] *= 2
+    bars.to_csv(root / "MSFT.csv", index=False)
+    with open(root / "AAPL_news.json", "w") as f:
+        json.dump([{"content": {"title": "Headline", "pubDate": "2025-03-10T10:00:00Z"}}], f)
+
+    provider = ReplayProvider(str(root), now=REPLAY_NOW)
+    set_provider(provider)
+    return provider
+
+
+@pytest.mark.unit
+class TestPriceStore:
+    """Tests for the on-disk OHLCV store"""
+
+    def test_period_start(self):
+        now = pd.Timestamp("2025-06-15", tz="UTC")
+        assert period_start("60d", now) == now - pd.Timedelta(days=60)
+        assert period_start("1mo", now) == pd.Timestamp("2025-05-15", tz="UTC")
+        assert period_start("ytd", now) == pd.Timestamp("2025-01-01", tz="UTC")
+        assert period_start("max", now) is None
+        with pytest.raises(ValueError):
+            period_start("forever", now)
+
+    def test_append_supersedes_existing_dates(self, tmp_path):
+        store = PriceStore(str(tmp_path), max_partitions=2)
+        store.write("AAPL", make_bars("2025-01-01", 5))
+
+        tail = make_bars("2025-01-05", 3)
+        tail["Close"] = 999.0
+        store.append("AAPL", tail)
+        store.append("AAPL", tail)  # triggers compaction
+
+        stored = store.read("AAPL")
+        assert len(stored) == 7
+        assert stored["Date"].is_monotonic_increasing
+        assert stored["Close"].iloc[4] == 999.0
+        assert len(store._partitions("AAPL")) == 1
+
+
+@pytest.mark.unit
+class TestReplayProvider:
+    """Tests for the offline replay provider"""
+
+    def test_history_periods_resolve_against_replay_now(self, replay):
+        assert len(replay.history("AAPL", period="max")) == 30
+        assert len(replay.history("AAPL", period="5d")) == 6
+        assert len(replay.history("AAPL", start="2025-03-10")) == 5
+        assert replay.history("NOPE", period="5d").empty
+
+    def test_news_and_quote(self, replay):
+        assert replay.news("AAPL")[0]["content"]["title"] == "Headline"
+        assert replay.news("MSFT") == []
+        assert replay.latest_quote("MSFT") == 2 * 129.0
+
+
+@pytest.mark.unit
+class TestStructuredData:
+    """Tests for get_structured_data reading through the store"""
+
+    def test_first_call_downloads_full_period(self, replay, price_store_dir):
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            hist = data_fetcher.get_structured_data("AAPL", period="60d")
+
+        assert len(hist) == 30
+        assert list(hist.columns) == ["Date", "Open", "High", "Low", "Close", "Volume"]
+        history.assert_called_once_with("AAPL", period="60d")
+
+    def test_fresh_store_skips_provider(self, replay, price_store_dir):
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            data_fetcher.get_structured_data("AAPL", period="60d")
+            hist = data_fetcher.get_structured_data("AAPL", period="5d")
+
+        assert history.call_count == 1
+        assert len(hist) == 6
+
+    def test_stale_store_fetches_only_tail(self, replay, price_store_dir, monkeypatch):
+        store = PriceStore(str(price_store_dir))
+        store.write("AAPL", replay.history("AAPL", period="max").head(25),
+                    covered_from="max", fetched_at=0)
+
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            hist = data_fetcher.get_structured_data("AAPL", period="60d")
+
+        history.assert_called_once_with("AAPL", start="2025-03-09")
+        assert len(hist) == 30
+        assert hist["Date"].is_unique
+
+
+@pytest.mark.unit
+class TestFetchMany:
+    """Tests for the batched multi-ticker fetch"""
+
+    def test_single_batched_request(self, replay, price_store_dir):
+        with patch.object(replay, "history_many", wraps=replay.history_many) as history_many:
+            frames = data_fetcher.fetch_many(["AAPL", "MSFT", "AAPL"], period="5d")
+
+            history_many.assert_called_once_with(["AAPL", "MSFT"], period="5d")
+            assert set(frames) == {"AAPL", "MSFT"}
+            assert frames["MSFT"]["Close"].iloc[-1] == 2 * frames["AAPL"]["Close"].iloc[-1]
+
+            # Second call is answered from the store
+            frames = data_fetcher.fetch_many(["AAPL", "MSFT"], period="5d")
+            assert history_many.call_count == 1
+            assert len(frames["AAPL"]) == 6
+
+    def test_missing_ticker_is_left_out(self, replay, price_store_dir):
+        frames = data_fetcher.fetch_many(["AAPL", "NOPE"], period="1d")
+
+        assert list(frames) == ["AAPL"]
+
+    @patch("backend.services.market_data_provider.yf.download")
+    def test_yfinance_batch_is_split_per_ticker(self, mock_download):
+        bars = make_bars("2025-03-12", 3).set_index("Date")
+        mock_download.return_value = pd.concat({"AAPL": bars, "MSFT": bars * 2}, axis=1)
+
+        frames = YFinanceProvider().history_many(["AAPL", "MSFT", "NOPE"], period="5d")
+
+        mock_download.assert_called_once()
+        assert set(frames) == {"AAPL", "MSFT"}
+        assert list(frames["AAPL"].columns) == ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+    @patch("backend.services.market_data_provider.yf.download")
+    def test_yfinance_batch_takes_a_token_per_ticker(self, mock_download):
+        from backend.utils.helpers import TokenBucket
+        mock_download.return_value = pd.DataFrame()
+        bucket = TokenBucket(rate=1000, capacity=2)
+
+        with patch.object(bucket, "acquire", wraps=bucket.acquire) as acquire:
+            YFinanceProvider(rate_limiter=bucket).history_many(["A", "B", "C", "D", "E"], period="5d")
+
+        assert acquire.call_count == 5
+        assert [call.args[0] for call in mock_download.call_args_list] == [["A", "B"], ["C", "D"], ["E"]]
+
+
+@pytest.mark.unit
+class TestTickerValidation:
+    """Tests for the ticker validity cache"""
+
+    def test_ttl_cache_expiry_and_persistence(self, tmp_path):
+        path = str(tmp_path / "tickers.json")
+        cache = TTLCache(ttl=60, path=path)
+        cache.set("AAPL", True)
+        cache.set("NOPE", False, ttl=-1)
+
+        reloaded = TTLCache(path=path)
+        assert reloaded.get("AAPL") is True
+        assert reloaded.get("NOPE") is None
+
+    def test_negative_result_is_cached(self, replay):
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            assert data_fetcher.validate_ticker("NOPE") is False
+            assert data_fetcher.validate_ticker("NOPE") is False
+
+        assert history.call_count == 1
+
+    def test_fetch_skips_separate_validation(self, replay, price_store_dir):
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            result = data_fetcher.fetch("AAPL", period="60d")
+
+            assert result["success"] is True
+            history.assert_called_once_with("AAPL", period="60d")
+            assert data_fetcher.validate_ticker("AAPL") is True
+            assert history.call_count == 1
+
+    @patch("backend.services.data_fetcher.get_structured_data")
+    def test_fetch_rejects_known_invalid_ticker(self, mock_hist):
+        data_fetcher._record_validity("NOPE", False)
+
+        result = data_fetcher.fetch("NOPE")
+
+        assert result["success"] is False
+        mock_hist.assert_not_called()
+
+
+@pytest.mark.unit
+class TestFetchParts:
+    """Tests for selecting fetch() parts and the news cache"""
+
+    def test_hist_only_skips_news(self, replay, price_store_dir):
+        with patch.object(replay, "news", wraps=replay.news) as news:
+            result = data_fetcher.fetch("AAPL", parts=("hist",))
+
+        news.assert_not_called()
+        assert set(result) == {"success", "ticker", "hist_df", "rows"}
+        assert result["rows"] == 30
+        assert result["hist_df"][0]["Date"].endswith("+00:00")
+
+    def test_merged_fetch_includes_news(self, replay, price_store_dir):
+        result = data_fetcher.fetch("AAPL")
+
+        assert result["success"] is True
+        assert result["news_df"][0]["title"] == "Headline"
+        assert result["merged_df"][0]["Close"] == 125.0
+
+    def test_news_is_cached(self, replay):
+        with patch.object(replay, "news", wraps=replay.news) as news:
+            first = data_fetcher.get_unstructured_data("AAPL")
+            second = data_fetcher.get_unstructured_data("AAPL")
+
+        assert news.call_count == 1
+        assert second["title"].iloc[0] == "Headline"
+        assert first is not second
+
+
+@pytest.mark.unit
+class TestFetchOrient:
+    """Tests for the records / columns / frame result shapes"""
+
+    def test_iso_dates_match_isoformat(self):
+        for values in [
+            pd.Series(pd.date_range("2025-03-01", periods=20, freq="D", tz="UTC")),
+            pd.Series(pd.date_range("2025-03-01", periods=20, freq="D", tz="America/New_York")),
+            pd.Series([pd.Timestamp("2025-01-01 10:00:00.5"), pd.NaT]),
+        ]:
+            expected = [v.isoformat() if pd.notnull(v) else None for v in values]
+            assert data_fetcher._iso_dates(values).tolist() == expected
+
+    def test_columns_and_frame_orients(self, replay, price_store_dir):
+        records = data_fetcher.fetch("AAPL", parts=("hist",))["hist_df"]
+        columns = data_fetcher.fetch("AAPL", parts=("hist",), orient="columns")["hist_df"]
+        frame = data_fetcher.fetch("AAPL", parts=("hist",), orient="frame")["hist_df"]
+
+        assert columns["Date"] == [row["Date"] for row in records]
+        assert columns["Close"] == [row["Close"] for row in records]
+        assert isinstance(frame, pd.DataFrame)
+        assert len(frame) == len(records)
+        assert str(frame["Date"].dt.tz) == "UTC"
+
+    def test_unknown_orient_is_rejected(self):
+        with pytest.raises(ValueError):
+            data_fetcher.fetch("AAPL", orient="table")
+
+
+@pytest.mark.unit
+class TestRequestCoalescing:
+    """Tests for single-flight fetch coalescing"""
+
+    def test_concurrent_fetches_share_one_upstream_call(self, replay, price_store_dir):
+        from concurrent.futures import ThreadPoolExecutor
+
+        replay.latency = 0.2
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(
+                    lambda _: data_fetcher.fetch("AAPL", parts=("hist",), orient="frame"),
+                    range(4)
+                ))
+
+        assert history.call_count == 1
+        assert all(result["success"] for result in results)
+        # Frames are copied per caller
+        assert results[0]["hist_df"] is not results[1]["hist_df"]
+
+    @pytest.mark.parametrize("orient", ["records", "columns"])
+    def test_followers_get_their_own_json_results(self, orient, replay, price_store_dir):
+        from concurrent.futures import ThreadPoolExecutor
+
+        replay.latency = 0.2
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                results = list(pool.map(
+                    lambda _: data_fetcher.fetch("AAPL", parts=("hist",), orient=orient),
+                    range(2)
+                ))
+
+        assert history.call_count == 1
+        first, second = results[0]["hist_df"], results[1]["hist_df"]
+        if orient == "records":
+            first[0]["Close"] = -1.0
+            assert second[0]["Close"] != -1.0
+        else:
+            first["Close"].append(-1.0)
+            assert second["Close"][-1] != -1.0
+
+    def test_failed_call_is_not_remembered(self):
+        from backend.utils.helpers import SingleFlight
+
+        flight = SingleFlight()
+        with pytest.raises(RuntimeError):
+            flight.do("key", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+        assert flight.do("key", lambda: 42) == 42
+
+
+@pytest.mark.unit
+class TestBackfill:
+    """Tests for chunked, resumable backfill"""
+
+    def test_backfill_writes_chunks_and_resumes(self, replay, price_store_dir):
+        chunks = data_fetcher.backfill("AAPL", "2025-02-13", chunk_days=7)
+        first = [next(chunks), next(chunks)]
+        chunks.close()  # interrupted after two chunks
+
+        assert [len(chunk) for chunk in first] == [7, 7]
+        store = PriceStore(str(price_store_dir))
+        assert len(store.read("AAPL")) == 14
+        assert store.get_meta("AAPL")["backfill"]["cursor"].startswith("2025-02-27")
+
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            rest = list(data_fetcher.backfill("AAPL", "2025-02-13", chunk_days=7))
+
+        assert history.call_args_list[0].kwargs["start"] == "2025-02-27"
+        assert sum(len(chunk) for chunk in rest) == 16
+        assert len(store.read("AAPL")) == 30
+        assert store.get_meta("AAPL")["covered_from"].startswith("2025-02-13")
+
+    def test_fetch_keeps_backfill_with_end(self, replay, price_store_dir):
+        list(data_fetcher.backfill("AAPL", "2025-02-13", end="2025-02-20", chunk_days=7))
+        store = PriceStore(str(price_store_dir))
+        assert store.get_meta("AAPL")["backfilled"] == [
+            ["2025-02-13T00:00:00+00:00", "2025-02-20T00:00:00+00:00"]
+        ]
+
+        hist = data_fetcher.get_structured_data("AAPL", period="5d")
+
+        assert len(hist) == 6
+        stored = store.read("AAPL")
+        assert len(stored) == 13
+        assert stored["Date"].iloc[0].strftime("%Y-%m-%d") == "2025-02-13"
+
+    def test_fetch_between_interrupted_backfill_and_resume(self, replay, price_store_dir):
+        chunks = data_fetcher.backfill("AAPL", "2025-02-13", chunk_days=7)
+        next(chunks)
+        chunks.close()
+
+        data_fetcher.get_structured_data("AAPL", period="5d")
+        store = PriceStore(str(price_store_dir))
+        assert len(store.read("AAPL")) == 13
+        assert store.get_meta("AAPL")["backfill"]["cursor"].startswith("2025-02-20")
+
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            list(data_fetcher.backfill("AAPL", "2025-02-13", chunk_days=7))
+
+        assert history.call_args_list[0].kwargs["start"] == "2025-02-20"
+        assert len(store.read("AAPL")) == 30
+        assert store.get_meta("AAPL")["covered_from"].startswith("2025-02-13")
+
+        # The whole month is now answered from the store
+        with patch.object(replay, "history", wraps=replay.history) as history:
+            hist = data_fetcher.get_structured_data("AAPL", period="1mo")
+        history.assert_not_called()
+        assert len(hist) == 29
+
+    def test_backfill_many_yields_per_ticker(self, replay, price_store_dir):
+        pairs = list(data_fetcher.backfill_many(["AAPL", "MSFT"], "2025-03-01", chunk_days=30))
+
+        assert [ticker for ticker, _ in pairs] == ["AAPL", "MSFT"]
+        assert all(len(chunk) == 14 for _, chunk in pairs)
+
+
+@pytest.mark.unit
+class TestAsyncFetching:
+    """Tests for the asyncio fetch layer and the shared rate limiter"""
+
+    def test_token_bucket_limits_rate(self):
+        import time
+        from backend.utils.helpers import TokenBucket
+
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        # Two calls ride the burst, the other two wait ~50ms each
+        assert time.monotonic() - started >= 0.09
+
+    def test_concurrency_cap(self):
+        import threading
+        import time
+        from backend.services import async_fetcher
+
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def slow_fetch(ticker, period, parts, orient):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return {"success": True, "ticker": ticker}
+
+        with patch.object(async_fetcher, "fetch", side_effect=slow_fetch):
+            results = async_fetcher.fetch_all([f"T{i}" for i in range(6)], concurrency=2)
+
+        assert state["peak"] == 2
+        assert [result["ticker"] for result in results.values()] == [f"T{i}" for i in range(6)]
+
+    def test_fetch_histories_retries_what_the_batch_missed(self, replay, price_store_dir):
+        from backend.services import async_fetcher
+
+        # The batch loses MSFT, as a multi-ticker download does when one ticker errors
+        with patch.object(replay, "history_many", return_value={"AAPL": replay.history("AAPL", period="5d")}):
+            frames = async_fetcher.fetch_histories(["AAPL", "MSFT", "NOPE"], period="5d")
+
+        assert set(frames) == {"AAPL", "MSFT"}
+        assert len(frames["MSFT"]) == 6
+
+    def test_fetch_all_against_replay(self, replay, price_store_dir):
+        from backend.services.async_fetcher import fetch_all
+
+        results = fetch_all(["AAPL", "MSFT", "NOPE"], parts=("hist",), orient="frame")
+
+        assert results["AAPL"]["success"] and results["MSFT"]["success"]
+        assert results["NOPE"]["success"] is False
+        assert len(results["MSFT"]["hist_df"]) == 30
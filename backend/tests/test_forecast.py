@@ -1,7 +1,7 @@
 import sys
 import os
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 # Add backend folder to Python path so imports work
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,7 +20,7 @@ sample_forecast_df = sample_hist_data
 sample_model_info = {"model": "LSTM", "rmse": 1.5, "mae": 1.2, "mape": 0.8}
 
 @pytest.mark.integration
-@patch("backend.services.data_fetcher.fetch")
+@patch("backend.routes.forecast.fetch")
 @patch("backend.services.lstmModel.trainModel")
 def test_lstm_forecast(mock_trainModel, mock_fetch, client, clean_forecasts):
     """Test LSTM forecast endpoint"""
@@ -46,3 +46,277 @@ def test_lstm_forecast(mock_trainModel, mock_fetch, client, clean_forecasts):
     assert isinstance(data["forecast"], list)
     assert "model_info" in data
 
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("option", ["epochs", "batch_size", "threads"])
+def test_lstm_forecast_rejects_non_positive_options(option, client, training_executor):
+    """Training options below 1 are a client error and never reach the training pool"""
+    with patch.object(training_executor, "submit") as submit:
+        response = client.post("/api/forecast/start", json={
+            "tickerName": "AAPL", "horizon": "5d", "model_name": "LSTM", option: 0
+        })
+
+    assert response.status_code == 400
+    assert option in response.get_json()["message"]
+    submit.assert_not_called()
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+def test_direct_forecast_fetches_enough_history(mock_fetch, client, training_executor):
+    """A long direct horizon asks for more than the default period and is refused when the bars run short"""
+    mock_fetch.return_value = {"success": True, "hist_df": sample_hist_data * 100}
+
+    with patch.object(training_executor, "submit") as submit:
+        response = client.post("/api/forecast/start", json={
+            "tickerName": "AAPL", "horizon": "1yr", "model_name": "LSTM", "forecast_mode": "direct"
+        })
+
+    assert response.status_code == 400
+    assert "too few" in response.get_json()["message"]
+    assert int(mock_fetch.call_args.kwargs["period"][:-1]) > 365
+    submit.assert_not_called()
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+def test_scheduled_retrain_keeps_request_options(mock_fetch, training_executor):
+    """A scheduled retrain trains with the mode and options of the request that scheduled it"""
+    from backend.routes.forecast import retrain_lstm_job
+    mock_fetch.return_value = {"success": True, "hist_df": sample_hist_data}
+
+    with patch.object(training_executor, "submit", return_value=("job", MagicMock())) as submit:
+        retrain_lstm_job("AAPL", "5d", "AAPL_lstm", "direct", {"epochs": 3, "batch_size": 16})
+
+    assert submit.call_args.args[5:] == ("direct", True, {"epochs": 3, "batch_size": 16})
+
+@pytest.mark.integration
+@pytest.mark.parametrize("endpoint", ["/api/forecast/start", "/api/forecast/predict"])
+def test_uncertainty_samples_are_capped(endpoint, client, training_executor):
+    """Each dropout path is a full forecast, so an oversized request is refused up front"""
+    from backend.services.lstm_config import MAX_UNCERTAINTY_SAMPLES
+
+    with patch("backend.routes.forecast.fetch") as mock_fetch:
+        response = client.post(endpoint, json={
+            "tickerName": "AAPL", "horizon": "5d", "model_name": "LSTM",
+            "uncertainty_samples": MAX_UNCERTAINTY_SAMPLES + 1
+        })
+
+    assert response.status_code == 400
+    assert "at most" in response.get_json()["message"]
+    mock_fetch.assert_not_called()
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+@patch("backend.routes.forecast.predictLSTMModel")
+def test_lstm_predict_without_weights(mock_predict, mock_fetch, client, clean_forecasts):
+    """Predict endpoint should ask for a training run when no weights are saved"""
+    mock_fetch.return_value = {"success": True, "hist_df": sample_hist_data}
+    mock_predict.side_effect = FileNotFoundError("no weights")
+
+    response = client.post("/api/forecast/predict", json={"tickerName": "AAPL", "horizon": "5d"})
+
+    assert response.status_code == 404
+    assert response.get_json()["success"] is False
+
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+@patch("backend.routes.forecast.predictGlobalModel")
+def test_global_predict_rejects_non_member(mock_predict, mock_fetch, client, clean_forecasts):
+    """A ticker outside the global model's universe is a client error"""
+    mock_fetch.return_value = {"success": True, "hist_df": sample_hist_data}
+    mock_predict.side_effect = ValueError("ZZZ is not part of the global model's universe")
+
+    response = client.post("/api/forecast/predict", json={"tickerName": "ZZZ", "global_model": True})
+
+    assert response.status_code == 400
+    assert "universe" in response.get_json()["message"]
+
+@pytest.mark.integration
+@pytest.mark.parametrize("option", [{"forecast_mode": "direct"}, {"uncertainty_samples": 8}])
+@patch("backend.routes.forecast.fetch")
+@patch("backend.routes.forecast.predictGlobalModel")
+def test_global_predict_rejects_per_ticker_options(mock_predict, mock_fetch, option, client, clean_forecasts):
+    """The global model has no direct mode or bands, so asking for them is a client error"""
+    response = client.post("/api/forecast/predict", json={"tickerName": "AAPL", "global_model": True, **option})
+
+    assert response.status_code == 400
+    mock_predict.assert_not_called()
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+@patch("backend.services.numpy_lstm.predictNumpyModel")
+def test_lstm_predict_serves_from_numpy_engine(mock_numpy_predict, mock_fetch, client, clean_forecasts):
+    """A plain predict request goes through the real dispatch to the NumPy engine"""
+    import pandas as pd
+    mock_fetch.return_value = {"success": True, "hist_df": sample_hist_data}
+    forecast_df = pd.DataFrame(sample_forecast_df).set_index("Date")
+    mock_numpy_predict.return_value = (forecast_df, {"model_type": "LSTM", "inference_engine": "numpy"})
+
+    response = client.post("/api/forecast/predict", json={"tickerName": "AAPL", "horizon": "5d"})
+
+    assert response.status_code == 200
+    assert response.get_json()["model_info"]["inference_engine"] == "numpy"
+    assert "uncertainty_samples" not in mock_numpy_predict.call_args.kwargs
+
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+@patch("backend.services.numpy_lstm.predictNumpyModel")
+@patch("backend.services.lstmModel.predictModel")
+def test_lstm_predict_bands_use_keras(mock_keras_predict, mock_numpy_predict, mock_fetch, client, clean_forecasts):
+    """Uncertainty bands need dropout sampling, so they skip the NumPy engine"""
+    import pandas as pd
+    mock_fetch.return_value = {"success": True, "hist_df": sample_hist_data}
+    forecast_df = pd.DataFrame(sample_forecast_df).set_index("Date")
+    mock_keras_predict.return_value = (forecast_df, {"model_type": "LSTM", "uncertainty_samples": 8})
+
+    response = client.post("/api/forecast/predict", json={
+        "tickerName": "AAPL", "horizon": "5d", "uncertainty_samples": 8
+    })
+
+    assert response.status_code == 200
+    mock_numpy_predict.assert_not_called()
+    assert mock_keras_predict.call_args.kwargs["uncertainty_samples"] == 8
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch")
+@patch("backend.services.lstmModel.trainModel")
+def test_lstm_forecast_async_job(mock_trainModel, mock_fetch, client, clean_forecasts, training_executor):
+    """Async training returns a job id that can be polled until the forecast is ready"""
+    import pandas as pd
+    from backend.models.lstmDb import lstmInfo
+    mock_fetch.return_value = {"success": True, "hist_df": pd.DataFrame(sample_hist_data * 100)}
+    mock_record = lstmInfo(ticker="AAPL", horizon="5d", forecast_data=sample_forecast_df, model_info=sample_model_info)
+    mock_trainModel.return_value = (pd.DataFrame(sample_forecast_df), sample_model_info, mock_record)
+
+    response = client.post("/api/forecast/start", json={
+        "tickerName": "AAPL",
+        "horizon": "5d",
+        "model_name": "LSTM",
+        "async": True
+    })
+    job_id = response.get_json()["job_id"]
+    training_executor.get(job_id).result(timeout=10)
+    status = client.get(f"/api/forecast/jobs/{job_id}").get_json()
+
+    assert response.status_code == 202
+    assert status["status"] == "done"
+    assert status["result"]["model_info"] == sample_model_info
+
+
+@pytest.mark.unit
+def test_app_import_does_not_load_tensorflow():
+    """The API should boot without TensorFlow; it is loaded on the first model request"""
+    import subprocess
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    code = "import sys, backend.routes.forecast, backend.routes.portfolio; print('tensorflow' in sys.modules)"
+
+    output = subprocess.run([sys.executable, "-c", code], cwd=repo_root, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip().splitlines()[-1] == "False"
+
+
+@pytest.mark.integration
+def test_training_telemetry_summary(client, test_db):
+    """Telemetry endpoint aggregates epoch timing and memory per ticker"""
+    from backend.models.lstmDb import lstmInfo
+    lstmInfo.objects(ticker="TLM").delete()
+    for epoch_seconds, rss in (([1.0, 2.0], 300.0), ([3.0], 500.0)):
+        lstmInfo(ticker="TLM", horizon="5d", forecast_data=sample_forecast_df, model_info={
+            "telemetry": {
+                "fit_seconds": sum(epoch_seconds),
+                "epoch_seconds": epoch_seconds,
+                "samples_per_second": [100 / s for s in epoch_seconds],
+                "loss_curve": [0.1] * len(epoch_seconds),
+                "sequence_build_seconds": 0.01,
+                "predict_seconds": 0.2,
+                "rss_before_fit_mb": rss - 100,
+                "fit_peak_rss_mb": rss
+            }
+        }).save()
+
+    response = client.get("/api/forecast/telemetry?ticker=TLM")
+    summary = response.get_json()["telemetry"]["TLM"]
+    lstmInfo.objects(ticker="TLM").delete()
+
+    assert response.status_code == 200
+    assert summary["runs"] == 2 and summary["epochs"] == 3
+    assert summary["mean_epoch_seconds"] == pytest.approx(2.0)
+    assert summary["max_fit_peak_rss_mb"] == 500.0
+
+
+@pytest.mark.integration
+def test_training_telemetry_rejects_bad_limit(client, test_db):
+    response = client.get("/api/forecast/telemetry?limit=ten")
+
+    assert response.status_code == 400
+    assert "limit" in response.get_json()["message"]
+
+
+@pytest.mark.integration
+def test_artifact_gc_keeps_recorded_bundles(client, test_db, tmp_path):
+    """GC endpoint removes only bundles no ref or lstmInfo record points at"""
+    from backend.models.lstmDb import lstmInfo
+    from backend.services import artifact_store
+
+    store = artifact_store.ArtifactStore(str(tmp_path))
+    recorded = store.save({"run": 1}, {})
+    orphan = store.save({"run": 2}, {})
+    lstmInfo.objects(ticker="GCT").delete()
+    lstmInfo(ticker="GCT", horizon="5d", forecast_data=sample_forecast_df, model_info={},
+             weights_file=recorded).save()
+
+    with patch.object(artifact_store, "_artifact_store", store):
+        response = client.post("/api/forecast/artifacts/gc", json={"grace_seconds": 0})
+    lstmInfo.objects(ticker="GCT").delete()
+
+    assert response.status_code == 200
+    assert response.get_json()["removed"] == [orphan]
+    assert store.bundle_ids() == [recorded]
+
+
+@pytest.mark.unit
+def test_training_executor_drops_expired_jobs():
+    """Finished jobs are forgotten once their TTL passes, so the job table cannot grow without bound"""
+    from concurrent.futures import ThreadPoolExecutor
+    from backend.services.training_executor import TrainingExecutor
+
+    executor = TrainingExecutor(max_workers=1, job_ttl=0,
+                                pool_factory=lambda workers, threads: ThreadPoolExecutor(workers))
+    job_id, future = executor.submit(sum, [1, 2])
+    future.result(timeout=10)
+
+    assert executor.status(job_id) is None
+    assert len(executor) == 0
+    executor.shutdown()
+
+
+@pytest.mark.integration
+@patch("backend.routes.forecast.fetch_histories")
+@patch("backend.services.global_lstm.trainGlobalModel")
+def test_global_training_runs_as_job(mock_train, mock_fetch_histories, client, clean_forecasts, training_executor):
+    """Global training is submitted to the training pool and can be polled like per-ticker jobs"""
+    import pandas as pd
+    from backend.models.forecast import Forecast
+    from backend.models.lstmDb import lstmInfo
+    mock_fetch_histories.return_value = {"AAPL": pd.DataFrame(sample_hist_data), "MSFT": pd.DataFrame(sample_hist_data)}
+    record = lstmInfo(ticker="GLOBAL", horizon="5d", forecast_data=sample_forecast_df, model_info=sample_model_info)
+    record.save()
+    forecast_df = pd.DataFrame(sample_forecast_df).set_index("Date")
+    mock_train.return_value = ({"AAPL": forecast_df, "MSFT": forecast_df}, sample_model_info, record)
+
+    response = client.post("/api/forecast/global/train", json={
+        "tickers": ["AAPL", "MSFT", "NOPE"], "horizon": "5d", "async": True, "epochs": 3, "batch_size": 16
+    })
+    job_id = response.get_json()["job_id"]
+    training_executor.get(job_id).result(timeout=10)
+    status = client.get(f"/api/forecast/jobs/{job_id}").get_json()
+    record.delete()
+
+    assert response.status_code == 202
+    assert response.get_json()["skipped_tickers"] == ["NOPE"]
+    assert status["status"] == "done"
+    assert set(status["result"]["forecast_ids"]) == {"AAPL", "MSFT"}
+    assert Forecast.objects(lstm_model=record).count() == 2
+    assert mock_train.call_args.kwargs == {"epochs": 3, "batch_size": 16}
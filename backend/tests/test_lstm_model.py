@@ -0,0 +1,581 @@
+"""
+Tests for the LSTM training service and its in-process model registry
+"""
+import sys
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import artifact_store, lstmModel, global_lstm, numpy_lstm, hyperparameter_search
+from backend.services.artifact_store import ArtifactStore, current_bundle, get_artifact_store
+from backend.services.model_registry import ModelLease, ModelRegistry, get_model_registry
+
+
+def make_history(n_days=60, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n_days))
+    return pd.DataFrame({
+        "Date": pd.bdate_range("2024-01-01", periods=n_days),
+        "Open": close + rng.normal(0, 0.5, n_days),
+        "High": close + 1,
+        "Low": close - 1,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 2_000_000, n_days).astype(float)
+    })
+
+
+def saved_manifest(weights_path):
+    return get_artifact_store().manifest(current_bundle(weights_path))
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    get_model_registry().clear()
+    yield
+    get_model_registry().clear()
+
+
+@pytest.fixture(autouse=True)
+def model_store(tmp_path):
+    """Keep every bundle a test saves under its own tmp_path"""
+    store = ArtifactStore(str(tmp_path / "store"))
+    with patch.object(artifact_store, "_artifact_store", store):
+        yield store
+
+
+@pytest.mark.unit
+class TestModelRegistry:
+    """Tests for LRU checkout/checkin with count and memory caps"""
+
+    def test_checkout_builds_then_reuses(self):
+        registry = ModelRegistry(max_models=2, sizeof=lambda model: 1)
+        builder = MagicMock(side_effect=lambda: object())
+
+        lease = registry.checkout("AAPL", builder)
+        assert not lease.warm
+        registry.checkin(lease)
+
+        again = registry.checkout("AAPL", builder)
+        assert again.warm and again.model is lease.model
+        assert builder.call_count == 1
+
+    def test_checked_out_model_is_exclusive(self):
+        registry = ModelRegistry(max_models=2, sizeof=lambda model: 1)
+        registry.checkin(registry.checkout("AAPL", object))
+
+        first = registry.checkout("AAPL", object)
+        second = registry.checkout("AAPL", object)
+
+        assert first.warm and not second.warm
+        assert first.model is not second.model
+
+    def test_training_checkout_resets_optimizer(self):
+        registry = ModelRegistry(max_models=2)
+        model = lstmModel.build_lstm_model((4, 5), 5)
+        model.fit(np.random.rand(8, 4, 5), np.random.rand(8, 5), epochs=1, verbose=0)
+        weights = model.get_weights()
+        registry.checkin(ModelLease("AAPL", model))
+
+        lease = registry.checkout("AAPL", MagicMock(), for_training=True)
+
+        assert lease.warm and lease.model is model
+        assert int(model.optimizer.iterations.numpy()) == 0
+        for before, after in zip(weights, model.get_weights()):
+            np.testing.assert_array_equal(before, after)
+
+    def test_evicts_least_recently_used(self):
+        registry = ModelRegistry(max_models=2, sizeof=lambda model: 1)
+        for key in ("AAPL", "MSFT"):
+            registry.checkin(registry.checkout(key, object))
+        registry.checkin(registry.checkout("AAPL", object))  # MSFT is now the oldest
+        registry.checkin(registry.checkout("TSLA", object))
+
+        assert "AAPL" in registry and "TSLA" in registry
+        assert "MSFT" not in registry
+
+    def test_memory_cap(self):
+        registry = ModelRegistry(max_models=10, max_bytes=250, sizeof=lambda model: 100)
+        for key in ("AAPL", "MSFT", "TSLA"):
+            registry.checkin(registry.checkout(key, object))
+
+        assert len(registry) == 2
+        assert registry.nbytes == 200
+
+
+@pytest.mark.unit
+class TestSequenceWindows:
+    """Tests for the strided window builder and its lazy batches"""
+
+    def test_matches_loop_reference(self):
+        data = np.arange(40, dtype=float).reshape(8, 5)
+        lookback = 3
+
+        X, y = lstmModel.create_sequences(data, lookback)
+
+        expected_X = np.array([data[i - lookback:i] for i in range(lookback, len(data))])
+        np.testing.assert_array_equal(X, expected_X)
+        np.testing.assert_array_equal(y, data[lookback:])
+
+    def test_windows_are_views(self):
+        data = np.arange(40, dtype=float).reshape(8, 5)
+
+        X, _ = lstmModel.create_sequences(data, 3)
+
+        assert np.shares_memory(X, data)
+
+    def test_too_short_returns_empty(self):
+        X, y = lstmModel.create_sequences(np.zeros((3, 5)), 3)
+        assert len(X) == 0 and len(y) == 0
+
+    @pytest.mark.parametrize("horizon", [None, 3])
+    def test_window_dataset_matches_sequences(self, horizon):
+        data = np.arange(100, dtype=float).reshape(20, 5)
+        X, y = lstmModel.create_sequences(data, 4, horizon)
+
+        pairs = list(lstmModel.window_dataset(data, 4, horizon).as_numpy_iterator())
+
+        assert len(pairs) == len(X)
+        np.testing.assert_array_equal(np.stack([w for w, _ in pairs]), X)
+        np.testing.assert_array_equal(np.stack([t for _, t in pairs]), y)
+
+    def test_training_dataset_covers_every_window_once(self):
+        data = np.arange(100, dtype=float).reshape(20, 5)
+        pairs = lstmModel.window_dataset(data, 4, shuffle_seed=0)
+
+        batches = list(lstmModel.training_dataset(pairs, batch_size=5, threads=2).as_numpy_iterator())
+        seen = np.concatenate([y for _, y in batches])
+
+        assert len(batches) == 4
+        assert batches[0][0].dtype == np.float32
+        np.testing.assert_array_equal(np.sort(seen[:, 0]), data[4:, 0])
+
+    def test_shuffled_windows_still_match_their_targets(self):
+        data = np.arange(100, dtype=float).reshape(20, 5)
+
+        pairs = list(lstmModel.window_dataset(data, 4, shuffle_seed=1).as_numpy_iterator())
+
+        assert [t[0] for _, t in pairs] != sorted(t[0] for _, t in pairs)
+        for window, target in pairs:
+            np.testing.assert_array_equal(target, window[-1] + 5)
+
+    def test_horizon_targets(self):
+        data = np.arange(40, dtype=float).reshape(8, 5)
+
+        X, y = lstmModel.create_sequences(data, 3, horizon=2)
+
+        assert X.shape == (4, 3, 5) and y.shape == (4, 2, 5)
+        np.testing.assert_array_equal(y[0], data[3:5])
+        np.testing.assert_array_equal(y[-1], data[6:8])
+
+
+@pytest.mark.model
+class TestTrainModelRegistry:
+    """trainModel should keep its compiled network warm between requests"""
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_second_training_reuses_compiled_model(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "REG_lstm.weights.h5")
+        history = make_history()
+        mock_record.objects.return_value.first.return_value = None  # no memoized run to reuse
+
+        with patch.object(lstmModel, "build_lstm_model", wraps=lstmModel.build_lstm_model) as build:
+            lstmModel.trainModel(history, "3d", ticker="REG", weights_path=weights_path)
+            forecast_df, model_info, _ = lstmModel.trainModel(history, "3d", ticker="REG", weights_path=weights_path)
+
+        assert build.call_count == 1
+        assert len(get_model_registry()) == 1
+        assert len(forecast_df) == 3
+        assert current_bundle(weights_path) is not None
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_unsaved_training_starts_fresh(self, mock_record):
+        history = make_history()
+        mock_record.objects.return_value.first.return_value = None
+
+        with patch.object(lstmModel, "build_lstm_model", wraps=lstmModel.build_lstm_model) as build:
+            lstmModel.trainModel(history, "3d", ticker="TMP")
+            lstmModel.trainModel(history, "3d", ticker="TMP")
+
+        assert build.call_count == 2
+        assert len(get_model_registry()) == 0
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_training_records_telemetry(self, mock_record, tmp_path):
+        _, model_info, _ = lstmModel.trainModel(make_history(), "3d", ticker="TEL", weights_path=str(tmp_path / "TEL.weights.h5"))
+
+        telemetry = model_info["telemetry"]
+        assert len(telemetry["epoch_seconds"]) == model_info["epochs_trained"]
+        assert len(telemetry["loss_curve"]) == model_info["epochs_trained"]
+        assert all(rate > 0 for rate in telemetry["samples_per_second"])
+        assert telemetry["predict_seconds"] > 0
+        assert telemetry["fit_peak_rss_mb"] >= telemetry["rss_before_fit_mb"] > 0
+
+
+@pytest.mark.model
+class TestTrainingMemoization:
+    """Identical bars and config reuse the stored run instead of refitting"""
+
+    def test_fingerprint_tracks_bars_and_config(self):
+        df = lstmModel.prepare_frame(make_history())
+        changed = df.copy()
+        changed.iloc[-1, 0] += 1
+
+        base = lstmModel.training_fingerprint(df, horizon="3d")
+        assert lstmModel.training_fingerprint(df.copy(), horizon="3d") == base
+        assert lstmModel.training_fingerprint(changed, horizon="3d") != base
+        assert lstmModel.training_fingerprint(df, horizon="5d") != base
+
+    def test_repeat_request_is_memoized(self, tmp_path):
+        weights_path = str(tmp_path / "MEM_lstm.weights.h5")
+        history = make_history()
+        first_df, _, first_record = lstmModel.trainModel(history, "3d", ticker="MEM", weights_path=weights_path)
+
+        with patch("tensorflow.keras.Model.fit") as fit:
+            forecast_df, model_info, record = lstmModel.trainModel(history, "3d", ticker="MEM", weights_path=weights_path)
+
+        fit.assert_not_called()
+        assert model_info["memoized"] is True
+        assert record.id == first_record.id
+        np.testing.assert_allclose(forecast_df.values, first_df.values)
+        assert (forecast_df.index == first_df.index).all()
+
+    def test_changed_weights_invalidate_memo(self, tmp_path):
+        weights_path = str(tmp_path / "INV_lstm.weights.h5")
+        history = make_history()
+        lstmModel.trainModel(history, "3d", ticker="INV", weights_path=weights_path)
+        lstmModel.trainModel(history.iloc[:-1], "3d", ticker="INV", weights_path=weights_path)
+
+        _, model_info, _ = lstmModel.trainModel(history, "3d", ticker="INV", weights_path=weights_path)
+
+        assert "memoized" not in model_info
+
+
+@pytest.mark.model
+class TestForecastModes:
+    """Direct multi-horizon output and the compiled recursive rollout"""
+
+    def test_recursive_forecast_matches_predict_loop(self):
+        model = lstmModel.build_lstm_model((4, 5), 5)
+        sequence = np.random.default_rng(1).random((4, 5))
+
+        forecast = lstmModel.recursive_forecast(model, sequence, 3)
+
+        expected, window = [], sequence.copy()
+        for _ in range(3):
+            next_pred = model.predict(window[np.newaxis], verbose=0)[0]
+            expected.append(next_pred)
+            window = np.vstack([window[1:], next_pred])
+        np.testing.assert_allclose(forecast, np.array(expected), rtol=1e-4, atol=1e-5)
+
+    def test_direct_weights_path(self):
+        path = os.path.join("backend", "weights", "AAPL_lstm.weights.h5")
+        assert lstmModel.direct_weights_path(path, 24) == os.path.join(
+            "backend", "weights", "AAPL_lstm_direct24.weights.h5"
+        )
+        assert lstmModel.direct_weights_path("BRK.B_lstm", 24) == "BRK.B_lstm_direct24"
+
+    def test_dotted_tickers_get_their_own_ref(self):
+        from backend.services.artifact_store import model_ref
+
+        assert model_ref("BRK.A_lstm") == "BRK.A_lstm"
+        assert model_ref(os.path.join("backend", "weights", "BRK.B_lstm.weights.h5")) == "BRK.B_lstm"
+        assert model_ref("BRK.A_lstm") != model_ref("BRK.B_lstm.h5")
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_direct_mode_forecasts_whole_horizon(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "DIR_lstm.weights.h5")
+
+        forecast_df, model_info, _ = lstmModel.trainModel(
+            make_history(), "5d", ticker="DIR", weights_path=weights_path, mode="direct"
+        )
+
+        assert len(forecast_df) == 5
+        assert model_info["forecast_mode"] == "direct"
+        assert current_bundle(lstmModel.direct_weights_path(weights_path, 5)) is not None
+        assert current_bundle(weights_path) is None
+
+    @pytest.mark.parametrize("mode, horizon", [("recursive", None), ("direct", 3)])
+    def test_dropout_samples_run_as_one_batch(self, mode, horizon):
+        model = lstmModel.build_lstm_model((4, 5), 5, horizon)
+        sequence = np.random.default_rng(2).random((4, 5))
+
+        with patch.object(model, "predict") as predict:
+            paths = lstmModel.dropout_samples(model, sequence, 3, mode, 32)
+
+        predict.assert_not_called()
+        assert paths.shape == (32, 3, 5)
+        assert paths.std(axis=0).min() > 0
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_training_adds_quantile_bands(self, mock_record):
+        mock_record.objects.return_value.first.return_value = None
+        forecast_df, model_info, _ = lstmModel.trainModel(make_history(), "3d", ticker="MCD", uncertainty_samples=16)
+
+        assert model_info["uncertainty_samples"] == 16
+        assert {"Close_q05", "Close_q50", "Close_q95"} <= set(forecast_df.columns)
+        assert (forecast_df["Close_q05"] <= forecast_df["Close_q50"]).all()
+        assert (forecast_df["Close_q50"] <= forecast_df["Close_q95"]).all()
+        assert "Close_q05" in mock_record.call_args.kwargs["forecast_data"][0]
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            lstmModel.trainModel(make_history(), "5d", mode="beam")
+
+
+@pytest.mark.model
+class TestPredictModel:
+    """predictModel should forecast from saved weights without fitting"""
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_predict_reuses_saved_weights_and_scaler(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "PRD_lstm.weights.h5")
+        history = make_history()
+        trained_df, _, _ = lstmModel.trainModel(history, "3d", ticker="PRD", weights_path=weights_path)
+        get_model_registry().clear()
+
+        with patch("tensorflow.keras.Model.fit") as fit:
+            forecast_df, model_info = lstmModel.predictModel(history, "3d", ticker="PRD", weights_path=weights_path)
+
+        fit.assert_not_called()
+        assert model_info["retrained"] is False
+        np.testing.assert_allclose(forecast_df.values, trained_df.values, rtol=1e-4)
+
+    def test_restore_scaler_matches_fitted(self):
+        from sklearn.preprocessing import MinMaxScaler
+        values = make_history()[["Open", "High", "Low", "Close", "Volume"]].values
+        fitted = MinMaxScaler().fit(values)
+
+        restored = lstmModel.restore_scaler({
+            "data_min": fitted.data_min_.tolist(),
+            "data_max": fitted.data_max_.tolist()
+        })
+
+        np.testing.assert_allclose(restored.transform(values), fitted.transform(values))
+
+    def test_missing_weights(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            lstmModel.predictModel(make_history(), "3d", weights_path=str(tmp_path / "NONE_lstm.weights.h5"))
+
+
+@pytest.mark.model
+class TestIncrementalTraining:
+    """Incremental retrains fine-tune on new bars with the stored scaler"""
+
+    def test_windows_split_new_and_replay(self):
+        data = np.random.default_rng(0).random((200, 5))
+        dates = pd.bdate_range("2024-01-01", periods=200)
+
+        X, y, new_rows, replay_rows = lstmModel.incremental_windows(data, dates, 10, None, dates[194])
+
+        np.testing.assert_array_equal(new_rows, np.arange(len(X) - 5, len(X)))
+        assert len(replay_rows) == lstmModel.INCREMENTAL_REPLAY_WINDOWS
+        assert replay_rows.max() < len(X) - 5
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_incremental_fine_tunes_only_new_bars(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "INC_lstm.weights.h5")
+        history = make_history(n_days=80)
+        lstmModel.trainModel(history.iloc[:75], "3d", ticker="INC", weights_path=weights_path)
+        first_config = saved_manifest(weights_path)
+
+        _, model_info, _ = lstmModel.trainModel(
+            history, "3d", ticker="INC", weights_path=weights_path, incremental=True
+        )
+
+        config = saved_manifest(weights_path)
+        assert model_info["incremental"] is True
+        assert model_info["epochs_trained"] <= lstmModel.INCREMENTAL_EPOCHS
+        assert model_info["test_size"] == 5
+        assert config["data_min"] == first_config["data_min"]
+        assert pd.Timestamp(config["last_trained_date"]) == history["Date"].iloc[-1]
+        assert mock_record.call_args.kwargs["last_trained_date"] == history["Date"].iloc[-1]
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_incremental_without_checkpoint_trains_fully(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "NEW_lstm.weights.h5")
+
+        _, model_info, _ = lstmModel.trainModel(
+            make_history(), "3d", ticker="NEW", weights_path=weights_path, incremental=True
+        )
+
+        assert model_info["incremental"] is False
+        assert saved_manifest(weights_path)["features"] == ["Open", "High", "Low", "Close", "Volume"]
+
+
+@pytest.mark.model
+class TestGlobalModel:
+    """One network trained across tickers serves forecasts for every member"""
+
+    def test_batches_draw_from_every_ticker(self):
+        sequences = [
+            lstmModel.create_sequences(np.random.default_rng(i).random((20, 5)), 4) for i in range(3)
+        ]
+        batches = global_lstm.GlobalSequenceBatches(sequences, batch_size=8)
+
+        ids = np.concatenate([batches[i][0][1].ravel() for i in range(len(batches))])
+
+        assert len(ids) == 3 * 16
+        assert set(ids) == {0, 1, 2}
+
+    @patch("backend.services.global_lstm.lstmInfo")
+    def test_train_then_predict_member(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "global_lstm.weights.h5")
+        histories = {"AAA": make_history(seed=1), "BBB": make_history(seed=2)}
+        histories["BBB"][["Open", "High", "Low", "Close"]] *= 50
+
+        forecasts, model_info, _ = global_lstm.trainGlobalModel(histories, "3d", weights_path=weights_path)
+        get_model_registry().clear()
+        forecast_df, _ = global_lstm.predictGlobalModel(histories["BBB"], "3d", "BBB", weights_path=weights_path)
+
+        assert set(forecasts) == {"AAA", "BBB"}
+        assert model_info["tickers"] == ["AAA", "BBB"]
+        assert mock_record.call_args.kwargs["tickers"] == ["AAA", "BBB"]
+        np.testing.assert_allclose(forecast_df.values, forecasts["BBB"].values, rtol=1e-4)
+
+    @patch("backend.services.global_lstm.lstmInfo")
+    def test_warm_start_needs_the_same_universe(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "global_lstm.weights.h5")
+        first = {"AAA": make_history(seed=1), "BBB": make_history(seed=2)}
+        swapped = {"AAA": make_history(seed=1), "CCC": make_history(seed=3)}
+        global_lstm.trainGlobalModel(first, "3d", weights_path=weights_path, epochs=1)
+        get_model_registry().clear()
+
+        with patch.object(global_lstm.Model, "set_weights") as set_weights:
+            global_lstm.trainGlobalModel(swapped, "3d", weights_path=weights_path, epochs=1)
+            set_weights.assert_not_called()  # same size, different members
+
+            get_model_registry().clear()
+            global_lstm.trainGlobalModel(swapped, "3d", weights_path=weights_path, epochs=1)
+            set_weights.assert_called_once()
+
+    @patch("backend.services.global_lstm.lstmInfo")
+    def test_predict_rejects_non_member(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "global_lstm.weights.h5")
+        global_lstm.trainGlobalModel({"AAA": make_history()}, "3d", weights_path=weights_path)
+
+        with pytest.raises(ValueError):
+            global_lstm.predictGlobalModel(make_history(), "3d", "ZZZ", weights_path=weights_path)
+
+
+@pytest.mark.model
+class TestNumpyInference:
+    """The NumPy engine must reproduce the Keras forward pass"""
+
+    @pytest.mark.parametrize("horizon", [None, 4])
+    def test_matches_keras(self, model_store, horizon):
+        model = lstmModel.build_lstm_model((10, 5), 5, horizon)
+        X = np.random.default_rng(3).random((6, 10, 5)).astype(np.float32)
+
+        bundle_id = artifact_store.save_keras_model(model, {"layers": numpy_lstm.numpy_layer_spec(model)})
+        engine = numpy_lstm.NumpyLSTM.from_bundle(model_store.load(bundle_id))
+
+        np.testing.assert_allclose(engine.predict(X), model.predict(X, verbose=0), rtol=1e-4, atol=1e-5)
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_predict_matches_keras_predict(self, mock_record, tmp_path):
+        weights_path = str(tmp_path / "NPY_lstm.weights.h5")
+        history = make_history()
+        lstmModel.trainModel(history, "3d", ticker="NPY", weights_path=weights_path)
+
+        numpy_df, model_info = numpy_lstm.predictNumpyModel(history, "3d", ticker="NPY", weights_path=weights_path)
+        keras_df, _ = lstmModel.predictModel(history, "3d", ticker="NPY", weights_path=weights_path)
+
+        assert model_info["inference_engine"] == "numpy"
+        np.testing.assert_allclose(numpy_df.values, keras_df.values, rtol=1e-3)
+        assert (numpy_df.index == keras_df.index).all()
+
+    def test_bundle_without_layer_spec_is_ignored(self):
+        model = lstmModel.build_lstm_model((10, 5), 5)
+        artifact_store.save_keras_model(model, {"lookback": 10}, ref="OLD_lstm")
+
+        with pytest.raises(FileNotFoundError):
+            numpy_lstm.predictNumpyModel(make_history(), "3d", weights_path="OLD_lstm")
+
+
+@pytest.mark.unit
+class TestArtifactStore:
+    """Bundles are content addressed, memory mapped and collected once unreferenced"""
+
+    def test_identical_content_shares_one_bundle(self, model_store):
+        arrays = {"w000": np.arange(6, dtype=np.float32).reshape(2, 3)}
+
+        first = model_store.save({"lookback": 4}, arrays)
+        second = model_store.save({"lookback": 4}, arrays)
+        other = model_store.save({"lookback": 5}, arrays)
+
+        assert first == second != other
+        assert model_store.bundle_ids() == sorted([first, other])
+
+    def test_load_is_memory_mapped(self, model_store):
+        bundle_id = model_store.save({"weights": ["w000"]}, {"w000": np.ones((3, 4), dtype=np.float32)})
+
+        bundle = model_store.load(bundle_id)
+
+        assert isinstance(bundle.arrays["w000"], np.memmap)
+        assert not bundle.arrays["w000"].flags.writeable
+        np.testing.assert_array_equal(bundle.weights[0], np.ones((3, 4)))
+
+    def test_gc_keeps_refs_and_referenced_bundles(self, model_store):
+        current = model_store.save({"run": 1}, {})
+        recorded = model_store.save({"run": 2}, {})
+        orphan = model_store.save({"run": 3}, {})
+        model_store.set_ref("AAPL_lstm", current)
+
+        assert model_store.gc([recorded], grace_seconds=3600) == []
+        assert model_store.gc([recorded], grace_seconds=0) == [orphan]
+        assert model_store.bundle_ids() == sorted([current, recorded])
+
+    @patch("backend.services.lstmModel.lstmInfo")
+    def test_retrain_keeps_previous_bundle(self, mock_record, model_store):
+        history = make_history()
+        mock_record.objects.return_value.first.return_value = None
+
+        lstmModel.trainModel(history.iloc[:-5], "3d", ticker="VER", weights_path="VER_lstm")
+        first = mock_record.call_args.kwargs["weights_file"]
+        lstmModel.trainModel(history, "3d", ticker="VER", weights_path="VER_lstm")
+        second = mock_record.call_args.kwargs["weights_file"]
+
+        assert first != second == model_store.resolve("VER_lstm")
+        assert model_store.exists(first)
+        assert model_store.manifest(first)["last_trained_date"] < model_store.manifest(second)["last_trained_date"]
+
+
+@pytest.mark.model
+class TestHyperparameterSearch:
+    """Search trials run on a pool, prune weak configurations and land in MongoDB"""
+
+    def test_sample_trials_caps_grid(self):
+        space = {"units": [16, 32], "dropout": [0.1, 0.2], "lookback": [10]}
+
+        assert len(hyperparameter_search.sample_trials(space, 10)) == 4
+        sampled = hyperparameter_search.sample_trials(space, 3)
+        assert len(sampled) == 3
+        assert all(set(trial) == set(space) for trial in sampled)
+
+    def test_median_pruning(self):
+        reports = {"3:0": 0.1, "3:1": 0.2, "3:2": 0.3}
+        callback = hyperparameter_search.MedianPruning(reports, trial_id=3, warmup_epochs=2)
+        callback.set_model(MagicMock())
+
+        callback.on_epoch_end(3, {"val_loss": 0.5})
+
+        assert callback.pruned and callback.model.stop_training
+        assert reports["3:3"] == 0.5
+
+    def test_run_search_records_trials(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from backend.models.tuning import HyperparameterTrial
+        from backend.services.training_executor import TrainingExecutor
+        executor = TrainingExecutor(max_workers=2, pool_factory=lambda workers, threads: ThreadPoolExecutor(workers))
+        space = {"units": [8, 16], "dropout": [0.1], "lookback": [10], "batch_size": [16], "learning_rate": [0.001]}
+
+        result = hyperparameter_search.runSearch(make_history(), "HPO", space, max_epochs=2, executor=executor)
+        executor.shutdown()
+
+        assert len(result["trials"]) == 2
+        assert result["best"]["params"]["units"] in (8, 16)
+        assert HyperparameterTrial.objects(search_id=result["search_id"]).count() == 2
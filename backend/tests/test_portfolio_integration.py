@@ -24,7 +24,7 @@ class TestPortfolioAPI:
             yield client
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_buy_endpoint(self, mock_price, client, test_db, clean_portfolio):
+    def test_buy_endpoint(self, mock_price, client, test_db, clean_portfolio, current_prices):
         """Test POST /api/portfolio/buy"""
         mock_price.return_value = 150.0
         
@@ -42,7 +42,7 @@ class TestPortfolioAPI:
         assert "remaining_cash" in data
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_buy_endpoint_missing_ticker(self, mock_price, client, test_db, clean_portfolio):
+    def test_buy_endpoint_missing_ticker(self, mock_price, client, test_db, clean_portfolio, current_prices):
         """Test POST /api/portfolio/buy with missing ticker"""
         response = client.post("/api/portfolio/buy", json={
             "quantity": 10.0
@@ -54,7 +54,7 @@ class TestPortfolioAPI:
         assert "Ticker is required" in data["message"]
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_sell_endpoint(self, mock_price, client, test_db, clean_portfolio):
+    def test_sell_endpoint(self, mock_price, client, test_db, clean_portfolio, current_prices):
         """Test POST /api/portfolio/sell"""
         mock_price.return_value = 155.0
         
@@ -78,7 +78,7 @@ class TestPortfolioAPI:
         assert data["success"] is True
         assert "transaction_id" in data
     
-    def test_get_positions_endpoint(self, client, test_db, clean_portfolio):
+    def test_get_positions_endpoint(self, client, test_db, clean_portfolio, current_prices):
         """Test GET /api/portfolio/positions"""
         with patch('backend.services.portfolio_service.get_current_price', return_value=150.0):
             # Buy some assets first
@@ -96,7 +96,7 @@ class TestPortfolioAPI:
         assert "data" in data
         assert isinstance(data["data"], list)
     
-    def test_get_summary_endpoint(self, client, test_db, clean_portfolio):
+    def test_get_summary_endpoint(self, client, test_db, clean_portfolio, current_prices):
         """Test GET /api/portfolio/summary"""
         response = client.get("/api/portfolio/summary")
         
@@ -110,7 +110,7 @@ class TestPortfolioAPI:
         assert "sharpe_ratio" in summary
         assert "positions" in summary
     
-    def test_get_performance_endpoint(self, client, test_db, clean_portfolio):
+    def test_get_performance_endpoint(self, client, test_db, clean_portfolio, current_prices):
         """Test GET /api/portfolio/performance"""
         response = client.get("/api/portfolio/performance?days=30")
         
@@ -121,7 +121,7 @@ class TestPortfolioAPI:
         assert isinstance(data["data"], list)
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_execute_strategy_endpoint(self, mock_price, client, test_db, clean_portfolio, clean_forecasts):
+    def test_execute_strategy_endpoint(self, mock_price, client, test_db, clean_portfolio, current_prices, clean_forecasts):
         """Test POST /api/portfolio/execute-strategy"""
         mock_price.return_value = 150.0
         
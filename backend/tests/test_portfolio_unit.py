@@ -50,7 +50,7 @@ class TestPortfolioService:
         assert portfolio2.initial_cash == 50000.0
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_buy_asset_success(self, mock_price, test_db, clean_portfolio):
+    def test_buy_asset_success(self, mock_price, test_db, clean_portfolio, current_prices):
         """Test successful buy order"""
         mock_price.return_value = 150.0
         
@@ -67,7 +67,7 @@ class TestPortfolioService:
         assert position.average_price == 150.0
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_buy_asset_insufficient_cash(self, mock_price, test_db, clean_portfolio):
+    def test_buy_asset_insufficient_cash(self, mock_price, test_db, clean_portfolio, current_prices):
         """Test buy order with insufficient cash"""
         mock_price.return_value = 150.0
         
@@ -78,7 +78,7 @@ class TestPortfolioService:
         assert "Insufficient cash" in result["message"]
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_sell_asset_success(self, mock_price, test_db, clean_portfolio):
+    def test_sell_asset_success(self, mock_price, test_db, clean_portfolio, current_prices):
         """Test successful sell order"""
         mock_price.return_value = 155.0
         
@@ -97,7 +97,7 @@ class TestPortfolioService:
         assert position.quantity == 5.0  # 10 - 5
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_sell_asset_insufficient_shares(self, mock_price, test_db, clean_portfolio):
+    def test_sell_asset_insufficient_shares(self, mock_price, test_db, clean_portfolio, current_prices):
         """Test sell order with insufficient shares"""
         mock_price.return_value = 155.0
         
@@ -107,7 +107,7 @@ class TestPortfolioService:
         assert "No position found" in result["message"] or "Insufficient shares" in result["message"]
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_get_portfolio_positions(self, mock_price, test_db, clean_portfolio):
+    def test_get_portfolio_positions(self, mock_price, test_db, clean_portfolio, current_prices):
         """Test getting portfolio positions"""
         mock_price.return_value = 155.0
         
@@ -128,10 +128,10 @@ class TestPortfolioService:
         assert "currentPrice" in aapl_pos
         assert "pnl" in aapl_pos
     
-    @patch('backend.services.portfolio_service.get_current_price')
-    def test_calculate_portfolio_value(self, mock_price, test_db, clean_portfolio):
+    @patch('backend.services.portfolio_service.get_current_prices')
+    def test_calculate_portfolio_value(self, mock_prices, test_db, clean_portfolio):
         """Test portfolio value calculation"""
-        mock_price.return_value = 155.0
+        mock_prices.return_value = {"AAPL": 155.0}
         
         portfolio = get_or_create_portfolio("test_portfolio")
         buy_asset("test_portfolio", "AAPL", 10.0, 150.0, "test")
@@ -141,7 +141,7 @@ class TestPortfolioService:
         assert value > 0
         assert value == portfolio.current_cash + (155.0 * 10.0)  # Cash + positions
     
-    def test_calculate_sharpe_ratio(self, test_db, clean_portfolio):
+    def test_calculate_sharpe_ratio(self, test_db, clean_portfolio, current_prices):
         """Test Sharpe ratio calculation"""
         portfolio = get_or_create_portfolio("test_portfolio")
         
@@ -159,7 +159,7 @@ class TestPortfolioService:
         # Sharpe ratio should be a number (could be 0 if no variance)
         assert isinstance(sharpe, float)
     
-    def test_get_portfolio_summary(self, test_db, clean_portfolio):
+    def test_get_portfolio_summary(self, test_db, clean_portfolio, current_prices):
         """Test getting portfolio summary"""
         portfolio = get_or_create_portfolio("test_portfolio")
         
@@ -174,7 +174,7 @@ class TestPortfolioService:
         assert "allocation" in summary
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_execute_strategy_momentum_buy(self, mock_price, test_db, clean_portfolio, clean_forecasts):
+    def test_execute_strategy_momentum_buy(self, mock_price, test_db, clean_portfolio, current_prices, clean_forecasts):
         """Test momentum strategy - buy signal"""
         mock_price.return_value = 150.0
         
@@ -197,7 +197,7 @@ class TestPortfolioService:
         assert result["forecast_analysis"]["predicted_change_percent"] > 2.0
     
     @patch('backend.services.portfolio_service.get_current_price')
-    def test_execute_strategy_momentum_hold(self, mock_price, test_db, clean_portfolio, clean_forecasts):
+    def test_execute_strategy_momentum_hold(self, mock_price, test_db, clean_portfolio, current_prices, clean_forecasts):
         """Test momentum strategy - hold signal"""
         mock_price.return_value = 150.0
         
@@ -218,3 +218,28 @@ class TestPortfolioService:
         assert result["success"] is True
         assert result["forecast_analysis"]["action_taken"] == "hold"
 
+
+
+@pytest.mark.unit
+class TestQuoteCache:
+    """Unit tests for the latest-quote cache used by pricing"""
+
+    def test_staleness_budget(self):
+        from backend.services.quote_cache import QuoteCache
+
+        cache = QuoteCache(max_age=60)
+        cache.put("AAPL", 150.0)
+
+        assert cache.get("AAPL") == 150.0
+        assert cache.get("AAPL", max_age=-1) is None
+        assert cache.get("MSFT") is None
+
+    @patch('backend.services.portfolio_service.fetch')
+    def test_current_price_served_from_cache(self, mock_fetch):
+        from backend.services.portfolio_service import get_current_price
+        from backend.services.quote_cache import get_quote_cache
+
+        get_quote_cache().put("CACHED", 42.0)
+
+        assert get_current_price("CACHED") == 42.0
+        mock_fetch.assert_not_called()